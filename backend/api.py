@@ -94,9 +94,10 @@ def _eapi_request(path: str, params: dict) -> dict:
     headers = NeteaseCloudMusic_headers.copy()
     # headers.update({"Content-Length": str(len(params))})
     url = "https://music.163.com" + path
-    response = requests.post(url, headers=headers, data=encrypted_params, timeout=4)
-    response.raise_for_status()
-    data = eapi_response_decrypt(response.content)
+    with requests.post(url, headers=headers, data=encrypted_params, timeout=4, stream=True) as response:
+        response.raise_for_status()
+        # 边接收边解密
+        data = eapi_response_decrypt(response.iter_content(chunk_size=65536))
     return json.loads(data)
 
 
@@ -656,7 +657,7 @@ def kg_search(keyword: str, search_type: SearchType, info: dict | None = None, p
                 results.append({
                     "id": lyric['id'],
                     "accesskey": lyric['accesskey'],
-                    "duration": lyric['duration'],
+                    "duration": round(lyric['duration'] / 1000),  # 接口返回毫秒, 与其他搜索结果统一为秒
                     "creator": lyric['nickname'],
                     "score": lyric['score'],
                     "source": Source.KG,
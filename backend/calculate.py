@@ -1,104 +1,173 @@
 # SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
 # SPDX-License-Identifier: GPL-3.0-only
+import heapq
 import re
+from collections import Counter, deque
+from collections.abc import Sequence
 from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import NamedTuple
 
+from backend.levenshtein import levenshtein_ratio
 from backend.lyrics import LyricsData, LyricsLine
+from backend.normalize import NORMALIZE_CACHE_SIZE, normalize_artist, normalize_title, symbol_map, unified_symbol  # noqa: F401
 from utils.enum import Source
 
-symbol_map = {
-    '（': '(',
-    '）': ')',
-    '：': ':',
-    '！': '!',
-    '？': '?',
-    '／': '/',
-    '＆': '&',
-    '＊': '*',
-    '＠': '@',
-    '＃': '#',
-    '＄': '$',
-    '％': '%',
-    '＼': '\\',
-    '｜': '|',
-    '＝': '=',
-    '＋': '+',
-    '－': '-',
-    '＜': '<',
-    '＞': '>',
-    '［': '[',
-    '］': ']',
-    '｛': '{',
-    '｝': '}',
-}
-
-
-def unified_symbol(text: str) -> str:
-    text = text.strip()
-    for k, v in symbol_map.items():
-        text = text.replace(k, v)
-    return re.sub(r"\s", " ", text)
+# 为True时text_difference使用基于编辑距离的相似度(更快, 分数与SequenceMatcher.ratio略有不同, 见benchmarks/similarity.py)
+USE_LEVENSHTEIN = False
 
 
 def text_difference(text1: str, text2: str) -> float:
     if text1 == text2:
         return 1.0
+    if USE_LEVENSHTEIN:
+        return levenshtein_ratio(text1, text2)
     # 计算编辑距离
     differ = SequenceMatcher(lambda x: x == " ", text1, text2)
     return differ.ratio()
 
 
-def list_max_difference(orig_list1: list[str | list[str]], orig_list2: list[str | list[str]], filter_empty: bool = True) -> float:
-    """计算两个列表中字符串的最大相似度"""
-    def list_str_max_difference(l1: list[str], l2: list[str]) -> float:
-        if filter_empty:
-            # 过滤掉空字符串
-            l1 = [item for item in l1 if item]
-            l2 = [item for item in l2 if item]
-        return max(text_difference(text1, text2) for text1 in l1 for text2 in l2)
+# 相似度上界的余量(避免浮点误差使上界略低于实际相似度)
+SIMILARITY_BOUND_EPSILON = 1e-9
 
-    list1: list[list[str]] = [[item] if not isinstance(item, list) else item for item in orig_list1]
-    list2: list[list[str]] = [[item] if not isinstance(item, list) else item for item in orig_list2]
 
-    if len(list1) >= len(list2) > 0:
-        scores = [(i1, i2, list_str_max_difference(l1, l2)) for i1, l1 in enumerate(list1) for i2, l2 in enumerate(list2)]
+def _similarity_upper_bound(text1: str, text2: str, counts: dict[str, Counter[str]]) -> float:
+    """text_difference的上界(相同字符的数量, 即SequenceMatcher.quick_ratio)"""
+    if text1 not in counts:
+        counts[text1] = Counter(text1)
+    if text2 not in counts:
+        counts[text2] = Counter(text2)
+    return 2.0 * sum((counts[text1] & counts[text2]).values()) / (len(text1) + len(text2))
 
-    elif len(list2) >= len(list1) > 0:
-        scores = [(i2, i1, list_str_max_difference(l2, l1)) for i2, l2 in enumerate(list2) for i1, l1 in enumerate(list1)]
-    else:
+
+def list_max_difference(orig_list1: Sequence[str | Sequence[str]], orig_list2: Sequence[str | Sequence[str]], filter_empty: bool = True) -> float:
+    """计算两个列表中字符串的最大相似度
+
+    按相似度从高到低(相同时按引索)贪心匹配两个列表中的项, 每项可以有多个别名(取别名之间的最大相似度)
+    先用长度得到每对项的相似度上界, 只在两项都未匹配且上界最高时计算实际相似度(有相同别名时直接为1)
+    """
+    list1: list[Sequence[str]] = [[item] if isinstance(item, str) else item for item in orig_list1]
+    list2: list[Sequence[str]] = [[item] if isinstance(item, str) else item for item in orig_list2]
+    if not list1 or not list2:
         return 0.0
 
-    scores.sort(key=lambda x: x[2], reverse=True)
+    # 较长的列表作为行(长度相同时为list1), 相似度为text_difference(行的别名, 列的别名)
+    rows, cols = (list1, list2) if len(list1) >= len(list2) else (list2, list1)
+    row_names = [tuple(dict.fromkeys(filter(None, names) if filter_empty else names)) for names in rows]
+    col_names = [tuple(dict.fromkeys(filter(None, names) if filter_empty else names)) for names in cols]
+    if not all(row_names) or not all(col_names):
+        msg = "列表中有没有歌手名的项"
+        raise ValueError(msg)
+    row_sets = [set(names) for names in row_names]
+    col_sets = [set(names) for names in col_names]
+
+    counts: dict[str, Counter[str]] = {}
+    differences: dict[tuple[str, str], float] = {}
+    group_scores: dict[tuple[tuple[str, ...], tuple[str, ...]], float] = {}
+
+    def group_score(names1: tuple[str, ...], names2: tuple[str, ...]) -> float:
+        """别名之间的最大相似度(跳过上界不超过当前最大值的别名对)"""
+        key = (names1, names2)
+        if key not in group_scores:
+            best = -1.0
+            for text1 in names1:
+                for text2 in names2:
+                    if best >= 0 and (2.0 * min(len(text1), len(text2)) / (len(text1) + len(text2)) + SIMILARITY_BOUND_EPSILON <= best or
+                                      _similarity_upper_bound(text1, text2, counts) + SIMILARITY_BOUND_EPSILON <= best):
+                        continue
+                    if (text1, text2) not in differences:
+                        differences[(text1, text2)] = text_difference(text1, text2)
+                    best = max(best, differences[(text1, text2)])
+            group_scores[key] = best
+        return group_scores[key]
+
+    if len(rows) == 1:
+        # 只有一对项
+        return 1.0 if not row_sets[0].isdisjoint(col_sets[0]) else group_score(row_names[0], col_names[0])
+
+    # (-相似度或上界, 原排序位置, 是否为实际相似度, 行, 列)
+    heap: list[tuple[float, int, bool, int, int]] = []
+    for i1, names1 in enumerate(row_names):
+        for i2, names2 in enumerate(col_names):
+            order = i1 * len(cols) + i2
+            if not row_sets[i1].isdisjoint(col_sets[i2]):
+                heap.append((-1.0, order, True, i1, i2))
+                continue
+            if len(names1) == len(names2) == 1:
+                bound = 2.0 * min(len(names1[0]), len(names2[0])) / (len(names1[0]) + len(names2[0]))
+            else:
+                bound = max(2.0 * min(len(text1), len(text2)) / (len(text1) + len(text2)) for text1 in names1 for text2 in names2)
+            heap.append((-min(bound + SIMILARITY_BOUND_EPSILON, 1.0), order, False, i1, i2))
+    heapq.heapify(heap)
 
     total_score = 0.0
     used_i1, used_i2 = set(), set()
+    while heap and len(used_i2) < len(cols):
+        negative_score, order, exact, i1, i2 = heapq.heappop(heap)
+        if i1 in used_i1 or i2 in used_i2:
+            continue
+        if not exact:
+            heapq.heappush(heap, (-group_score(row_names[i1], col_names[i2]), order, True, i1, i2))
+            continue
+        used_i1.add(i1)
+        used_i2.add(i2)
+        total_score += -negative_score
 
-    for i1, i2, score in scores:
-        if i1 not in used_i1 and i2 not in used_i2:
-            used_i1.add(i1)
-            used_i2.add(i2)
-            total_score += score
-            if len(used_i1) == len(list1) or len(used_i2) == len(list2):
-                break
+    return total_score / len(rows)
+
+
+ARTIST_CV_PATTERN = re.compile(r"[Cc][Vv][.:]")
+# 组织名(角色1・角色2...)/CV:歌手1・歌手2...
+ARTIST_GROUP_CV_PATTERN = re.compile(r"^(?P<group>.*)\s?\((?P<characters>.+)\)/[Cc][Vv][.:]\s?(?P<songers>.+)$")
+# 组织名(角色1・角色2...CV:歌手1・歌手2...)
+ARTIST_GROUP_INNER_CV_PATTERN = re.compile(r"^(?P<group>.*)\s?\((?P<characters>.+)[Cc][Vv][.:](?P<songers>.+)\)$")
+# 组织名(歌手名)
+ARTIST_GROUP_SONGERS_PATTERN = re.compile(r"^(?P<group>.*)\s?\(+(?P<songers>[^)]+)\)+$")
+ARTIST_SONGERS_SPLIT_PATTERN = re.compile(r"[,、・]")
+# 组织名 ...
+ARTIST_GROUP_PREFIX_PATTERN = re.compile(r"^(?P<group>.*[^&])\s(?P<artist_str>[^(&a-zA-Z].*)$")
+ARTIST_DOT_SPLIT_PATTERN = re.compile(r"(\))\.")
+ARTIST_SPLIT_PATTERN = re.compile(r"[,、/\\&]")
+ARTIST_FEAT_PATTERN = re.compile(r"^(?P<songer1>.*)\s?feat\.(?P<character>.*)\s?\((?P<songer2>.*)\)$")
+# 歌手名(歌手别名)或角色名(歌手名)
+ARTIST_ALIAS_PATTERN = re.compile(r"^(?P<name1>.*)\s?\((?:[Cc][Vv][.:]|[Vv][Oo][.:])?(?P<name2>.*)\)$")
+ARTIST_NOT_NAME_PATTERN = re.compile(r"[)(:]")  # 歌手列表中不是纯粹歌手名的
+
+
+class ParsedArtist(NamedTuple):
+    """解析后的歌手字符串(不可变, 可直接传给calculate_artist_score)"""
+
+    groups: tuple[str, ...]  # 组织名
+    artists: tuple[tuple[str, ...], ...]  # (歌手名, 歌手别名)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def parse_artist(artist: str) -> ParsedArtist:
+    """解析歌手字符串(按原字符串缓存)
 
-    return total_score / max(len(list1), len(list2))
+    :param artist: 歌手字符串
+    """
+    groups, artists = _artist_str2list(artist)
+    return ParsedArtist(tuple(groups), tuple(tuple(names) for names in artists))
 
 
 def artist_str2list(artist: str) -> tuple[list[str], list[list[str]]]:
-    """将歌手字符串转换为列表
+    """将歌手字符串转换为列表(每次返回新的列表)
 
     :param artist: 歌手字符串
     :return: 歌手列表 ([组织名,...], [[歌手名, 歌手别名],...])
     """
-    if all(len(s) == 1 for s in artist.split(" ")):
-        artist = "".join(artist.split(" "))
+    parsed = parse_artist(artist)
+    return list(parsed.groups), [list(names) for names in parsed.artists]
 
+
+def _artist_str2list(artist: str) -> tuple[list[str], list[list[str]]]:
     # 匹配特定样式
-    artist = artist.strip().replace('·', '・').replace('（', '(').replace('）', ')').replace('：', ':')
+    artist = normalize_artist(artist)
 
-    if "・" in artist and re.search(r"[Cc][Vv][.:]", artist):  # 包含"・"与"CV:"的
+    if "・" in artist and ARTIST_CV_PATTERN.search(artist):  # 包含"・"与"CV:"的
         # 组织名(角色1・角色2...)/CV:歌手1・歌手2...
-        matched: re.Match[str] | None = re.search(r"^(?P<group>.*)\s?\((?P<characters>.+)\)/[Cc][Vv][.:]\s?(?P<songers>.+)$", artist)
+        matched: re.Match[str] | None = ARTIST_GROUP_CV_PATTERN.search(artist)
         if matched and "・" in matched.group("characters") and "・" in matched.group("songers"):
             characters = [unified_symbol(c) for c in matched.group("characters").split("・")]
             songers = [unified_symbol(s) for s in matched.group("songers").split("・")]
@@ -110,7 +179,7 @@ def artist_str2list(artist: str) -> tuple[list[str], list[list[str]]]:
         artists = []
         groups = []
         for splited in split_result:
-            matched: re.Match[str] | None = re.search(r"^(?P<group>.*)\s?\((?P<characters>.+)[Cc][Vv][.:](?P<songers>.+)\)$", splited)
+            matched: re.Match[str] | None = ARTIST_GROUP_INNER_CV_PATTERN.search(splited)
             if matched and "・" in matched.group("characters") and "・" in matched.group("songers"):
                 characters = [unified_symbol(c) for c in matched.group("characters").split("・")]
                 songers = [unified_symbol(s) for s in matched.group("songers").split("・")]
@@ -127,22 +196,22 @@ def artist_str2list(artist: str) -> tuple[list[str], list[list[str]]]:
 
     if artist.count("(") == artist.count(")") in [1, 2]:
         # 组织名(歌手名)
-        matched: re.Match[str] | None = re.search(r"^(?P<group>.*)\s?\(+(?P<songers>[^)]+)\)+$", artist)
+        matched: re.Match[str] | None = ARTIST_GROUP_SONGERS_PATTERN.search(artist)
         if matched:
-            split_result = re.split(r"[,、・]", matched.group("songers"))
+            split_result = ARTIST_SONGERS_SPLIT_PATTERN.split(matched.group("songers"))
             if len(split_result) > 1:
                 return [matched.group("group")], [[unified_symbol(s)] for s in split_result]
 
     # 组织名 ...
     groups = []
     artists_str = None
-    matched: re.Match[str] | None = re.search(r"^(?P<group>.*[^&])\s(?P<artist_str>[^(&a-zA-Z].*)$", artist)
+    matched: re.Match[str] | None = ARTIST_GROUP_PREFIX_PATTERN.search(artist)
     if matched:
         groups = [matched.group("group")]
         artist = matched.group("artist_str")
 
     # 以"."分隔("."有时可能表示"・")
-    splited = re.split(r"(\))\.", artist)
+    splited = ARTIST_DOT_SPLIT_PATTERN.split(artist)
     if len(splited) > 1 and (len(splited) + 1) % 2 == 0:
         artists_str = []
         for i, s in enumerate(splited):
@@ -152,7 +221,7 @@ def artist_str2list(artist: str) -> tuple[list[str], list[list[str]]]:
                 artists_str[-1] += s
 
     # 以","或"、"或"/"或"\"或"&"分隔
-    splited = re.split(r"[,、/\\&]", artist)
+    splited = ARTIST_SPLIT_PATTERN.split(artist)
     if len(splited) > 1:
         artists_str = [unified_symbol(s) for s in splited]
 
@@ -161,14 +230,14 @@ def artist_str2list(artist: str) -> tuple[list[str], list[list[str]]]:
 
     artists = []
     for artist_str in artists_str:
-        matched = re.search(r"^(?P<songer1>.*)\s?feat\.(?P<character>.*)\s?\((?P<songer2>.*)\)$", artist_str)
+        matched = ARTIST_FEAT_PATTERN.search(artist_str)
         if matched:
             artists.append([unified_symbol(matched.group("songer1"))])
             artists.append(list({matched.group("songer2").strip(), matched.group("character").strip()}))
             continue
 
         # 歌手名(歌手别名)或角色名(歌手名)
-        matched = re.search(r"^(?P<name1>.*)\s?\((?:[Cc][Vv][.:]|[Vv][Oo][.:])?(?P<name2>.*)\)$", artist_str)
+        matched = ARTIST_ALIAS_PATTERN.search(artist_str)
         if matched:
             artists.append(list({matched.group("name1").strip(), matched.group("name2").strip()}))
             continue
@@ -178,18 +247,23 @@ def artist_str2list(artist: str) -> tuple[list[str], list[list[str]]]:
     return groups, artists
 
 
-def calculate_artist_score(artist1: str | list[str], artist2: str | list[str]) -> float:
+def calculate_artist_score(artist1: str | list[str] | ParsedArtist, artist2: str | list[str] | ParsedArtist) -> float:
+    """计算歌手相似度
+
+    :param artist1: 歌手字符串/歌手列表/parse_artist的结果(同一歌手与多个候选比较时可预先解析)
+    :param artist2: 同artist1
+    """
     score = 0
     artists: list = [artist1, artist2]
     for i, artist in enumerate(artists):
         if isinstance(artist, list):
             for a in artist:
-                if re.search(r"[)(:]", a):
+                if ARTIST_NOT_NAME_PATTERN.search(a):
                     # 说明不是纯粹的歌手名
-                    artists[i] = artist_str2list("/".join(artist))
+                    artists[i] = parse_artist("/".join(artist))
                     break
         elif isinstance(artist, str):
-            artists[i] = artist_str2list(artist)
+            artists[i] = parse_artist(artist)
 
     is_list = [i for i in range(len(artists)) if isinstance(artists[i], list)]
     if len(is_list) == 0:
@@ -223,7 +297,8 @@ def calculate_artist_score(artist1: str | list[str], artist2: str | list[str]) -
         score = max(score, list_max_difference(artists[list_index], artists[tuple_index][1]))
         if score == 1:
             return 100
-        score = max(score, text_difference("".join(artists[list_index]), "".join(artists[tuple_index][0] + [a for sl in artists[tuple_index][1] for a in sl])))
+        tuple_text = "".join([*artists[tuple_index][0], *(a for sl in artists[tuple_index][1] for a in sl)])
+        score = max(score, text_difference("".join(artists[list_index]), tuple_text))
 
         if len(artists[list_index]) == 1 and artists[tuple_index][0]:
             score = max(score, list_max_difference(artists[list_index], artists[tuple_index][0]) * 0.6)
@@ -234,30 +309,58 @@ def calculate_artist_score(artist1: str | list[str], artist2: str | list[str]) -
 TITLE_TAG_PATTERN = re.compile(r"|".join([r"[-<(\[～]([～\]^)>-]*)[～\]^)>-]",  # noqa: FLY002
                                           r"(\w+ ?(?:(?:solo |size )?ver(?:sion)?\.?|size|style|mix(?:ed)?|edit(?:ed)?|版|solo))",
                                           r"(纯音乐|inst\.?(?:rumental)|off ?vocal(?: ?[Vv]er.)?)"]))
+TITLE_TAG_SYMBOLS = frozenset("-><)(][～")  # 获取非tags部分时去除的符号
+TITLE_TAG_ENDINGS = ("solo", "mix", "edit", "style", "size", "inst")  # 普通标签的结尾
+
+# 统一tags
+TITLE_TAG_VER_PATTERN = re.compile(r"ver(?:sion)?\.?")
+TITLE_TAG_INST_PATTERN = re.compile(r"伴奏|纯音乐|inst\.?(?:rumental)|off ?vocal(?: ?[Vv]er.)?")
+TITLE_TAG_SUFFIX_VER_PATTERN = re.compile(r"(solo|mix|edit|style|size) ver")
+TITLE_TAG_TV_SIZE_PATTERN = re.compile("(?:tv|anime) ?(?:サイズ|size)?(?: ?edit)?(?: ?ver)?")
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _canonical_title_tag(tag: str) -> str:
+    """统一一些tags"""
+    tag = TITLE_TAG_VER_PATTERN.sub("ver", tag)
+    tag = TITLE_TAG_INST_PATTERN.sub("inst", tag)
+    tag = tag.replace("mixed", "mix").replace("edited", "edit")
+    tag = TITLE_TAG_SUFFIX_VER_PATTERN.sub(r"\1", tag)
+    return TITLE_TAG_TV_SIZE_PATTERN.sub("tv size", tag)
+
+
+def _remove_title_tags(text: str, tags: list[str]) -> str:
+    """从左到右去除tags(按顺序优先, 按原文匹配)与TITLE_TAG_SYMBOLS中的符号"""
+    tags = [tag for tag in tags if tag]
+    first_chars = {tag[0] for tag in tags}
+    result = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char in first_chars:
+            tag = next((tag for tag in tags if text.startswith(tag, i)), None)
+            if tag is not None:
+                i += len(tag)
+                continue
+        if char not in TITLE_TAG_SYMBOLS:
+            result.append(char)
+        i += 1
+    return "".join(result)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def title_tags(not_same: str) -> tuple[tuple[str, ...], str]:
+    """获取标签(按字符串缓存, 同一标题与多个候选比较时不同的部分通常相同)
+
+    :param not_same: 两个标题不同的部分
+    :return: 统一后的tags, 非tags部分
+    """
+    tags = [item.strip() for tup in TITLE_TAG_PATTERN.findall(not_same) for item in tup if item]  # 去除空字符串与符号
+    return tuple(_canonical_title_tag(tag) for tag in tags), _remove_title_tags(not_same, tags)
 
 
 def calculate_title_score(title1: str, title2: str) -> float:
-    def get_tags(not_same: str) -> tuple[list, str]:
-        """获取标签
-
-        :param not_same: 两个标题不同的部分
-        """
-        not_same_tags = TITLE_TAG_PATTERN.findall(not_same)
-        not_same_tags: list[str] = [item.strip() for tup in not_same_tags for item in tup if item]  # 去除空字符串与符号
-        not_same_other = re.sub(r"|".join(not_same_tags) + r"|[-><)(\]\[～]", "", not_same)  # 获取非tags部分
-
-        # 统一一些tags
-        for i, tag in enumerate(not_same_tags):
-            tag_ = re.sub(r"ver(?:sion)?\.?", "ver", tag)
-            tag_ = re.sub(r"伴奏|纯音乐|inst\.?(?:rumental)|off ?vocal(?: ?[Vv]er.)?", "inst", tag_)
-            tag_ = tag_.replace("mixed", "mix").replace("edited", "edit")
-            tag_ = re.sub(r"(solo|mix|edit|style|size) ver", r"\1", tag_)
-            tag_ = re.sub("(?:tv|anime) ?(?:サイズ|size)?(?: ?edit)?(?: ?ver)?", "tv size", tag_)
-            not_same_tags[i] = tag_
-
-        return not_same_tags, not_same_other
-
-    title1, title2 = unified_symbol(title1).lower(), unified_symbol(title2).lower()
+    title1, title2 = normalize_title(title1), normalize_title(title2)
     if title1 == title2:
         return 100
 
@@ -273,24 +376,24 @@ def calculate_title_score(title1: str, title2: str) -> float:
     if same_begin in (title1, title2) or not same_begin:
         return score0
 
-    not_same1_tags, not_same1_other = get_tags(title1[len(same_begin):])
-    not_same2_tags, not_same2_other = get_tags(title2[len(same_begin):])
+    not_same1_tags, not_same1_other = title_tags(title1[len(same_begin):])
+    not_same2_tags, not_same2_other = title_tags(title2[len(same_begin):])
 
     # 计算tags相似度
     tag1_no_match = []
-    tag2_no_match = not_same2_tags
+    tag2_no_match = list(not_same2_tags)
     for tag1 in not_same1_tags:
-        if tag1 in not_same2_tags:
+        if tag1 in tag2_no_match:
             # tag匹配
             tag2_no_match.remove(tag1)
-        elif re.search(r"(?:solo|mix|edit|style|size|edit|inst)$", tag1):
+        elif tag1.endswith(TITLE_TAG_ENDINGS):
             # 普通标签
             tag1_no_match.append(tag1)
         elif tag1 in not_same2_other:
             not_same1_other += tag1
 
     for tag2 in tag2_no_match:
-        if not re.search(r"(?:solo|mix|edit|style|size|edit|inst)$", tag2) and tag2 in not_same1_other:
+        if not tag2.endswith(TITLE_TAG_ENDINGS) and tag2 in not_same1_other:
             not_same2_other += tag2
             tag2_no_match.remove(tag2)
 
@@ -311,18 +414,225 @@ def calculate_title_score(title1: str, title2: str) -> float:
     return max(score1 * 0.7 + max(score2, score3), score0)
 
 
+def calculate_candidate_score(query: dict, candidate: dict) -> float:
+    """计算搜索结果与查询的匹配分数(标题与歌手各占一半, 任一方没有歌手时只计算标题)
+
+    :param query: 查询 {title, artist}
+    :param candidate: 搜索结果 {title, artist}
+    """
+    title_score = calculate_title_score(query["title"], candidate["title"])
+    if not query.get("artist") or not candidate.get("artist"):
+        return title_score
+    return title_score * 0.5 + calculate_artist_score(query["artist"], candidate["artist"]) * 0.5
+
+
+def _title_score_upper_bound(matcher: SequenceMatcher, title1: str, title2: str) -> float:
+    """calculate_title_score的上界(title1/title2已规范化, matcher的seq2为title1)
+
+    没有相同的开头或一个标题是另一个的开头时, 分数只来自文本相似度, 可用quick_ratio估计
+    """
+    if title1 == title2:
+        return 100
+    same_begin_length = 0
+    for text1, text2 in zip(title1, title2, strict=False):
+        if text1 != text2:
+            break
+        same_begin_length += 1
+    if same_begin_length and same_begin_length not in (len(title1), len(title2)):
+        return 100
+
+    matcher.set_seq1(title2)
+    return min(matcher.real_quick_ratio(), matcher.quick_ratio()) * 100
+
+
+class DurationWindow(NamedTuple):
+    """按时长预筛选搜索结果(单位为秒, 与搜索结果及Lyrics.duration相同)
+
+    时长相差不超过tolerance时不扣分, 在tolerance与limit之间按比例扣分(相差limit时扣penalty分), 超过limit时跳过
+    """
+
+    tolerance: int = 3
+    limit: int = 20
+    penalty: float = 15.0
+
+    def get_penalty(self, gap: int) -> float | None:
+        """时长相差gap秒时的扣分, 需要跳过时返回None"""
+        if gap <= self.tolerance:
+            return 0.0
+        if gap > self.limit:
+            return None
+        return self.penalty * (gap - self.tolerance) / (self.limit - self.tolerance)
+
+
+def prefilter_by_duration(duration: int | None,
+                          candidates: list[dict],
+                          window: DurationWindow) -> tuple[list[tuple[int, dict, float]], int]:
+    """按时长预筛选搜索结果并按扣分排序
+
+    查询或搜索结果没有时长时不扣分
+    :param duration: 查询的时长(秒)
+    :param candidates: 搜索结果(duration的单位为秒, api中构建搜索结果时已统一单位)
+    :param window: 时长范围
+    :return: [(索引, 搜索结果, 扣分)] 按扣分从小到大(相同时按原顺序), 跳过的数量
+    """
+    kept: list[tuple[int, dict, float]] = []
+    for index, candidate in enumerate(candidates):
+        if not duration or not candidate.get("duration"):
+            kept.append((index, candidate, 0.0))
+            continue
+        penalty = window.get_penalty(abs(candidate["duration"] - duration))
+        if penalty is not None:
+            kept.append((index, candidate, penalty))
+    kept.sort(key=lambda item: item[2])
+    return kept, len(candidates) - len(kept)
+
+
+def rank_candidates(query: dict,
+                    candidates: list[dict],
+                    top_k: int = 1,
+                    duration_window: DurationWindow | None = None,
+                    stats: dict[str, int] | None = None) -> list[tuple[float, dict]]:
+    """按calculate_candidate_score选出分数最高的top_k个搜索结果
+
+    结果与对所有候选计算分数(减去时长扣分)后稳定排序相同; 先用标题相似度的上界(real_quick_ratio/quick_ratio)排序与剪枝,
+    上界不可能进入前top_k时不再计算完整分数
+    :param query: 查询 {title, artist, duration(秒, 可选)}
+    :param candidates: 搜索结果
+    :param top_k: 返回的数量
+    :param duration_window: 时长范围(为None时不按时长筛选)
+    :param stats: 不为None时写入 candidates(搜索结果数), skipped(按时长跳过数), scored(计算完整分数数)
+    :return: [(分数, 搜索结果)] 按分数从高到低(分数相同时按原顺序)
+    """
+    if duration_window is not None:
+        kept, skipped = prefilter_by_duration(query.get("duration"), candidates, duration_window)
+    else:
+        kept, skipped = [(index, candidate, 0.0) for index, candidate in enumerate(candidates)], 0
+    if stats is not None:
+        stats.update(candidates=len(candidates), skipped=skipped, scored=0)
+    if top_k <= 0:
+        return []
+
+    query_title = normalize_title(query["title"])
+    has_artist = bool(query.get("artist"))
+    if has_artist and isinstance(query["artist"], str):
+        query = {**query, "artist": parse_artist(query["artist"])}
+    matcher = SequenceMatcher(lambda x: x == " ")
+    matcher.set_seq2(query_title)
+
+    bounded: list[tuple[float, int, dict, float]] = []  # (分数上界, 索引, 候选, 扣分)
+    for index, candidate, penalty in kept:
+        title_bound = _title_score_upper_bound(matcher, query_title, normalize_title(candidate["title"]))
+        bound = title_bound * 0.5 + 50 if has_artist and candidate.get("artist") else title_bound
+        # 上界加上SIMILARITY_BOUND_EPSILON, 避免浮点误差使上界略低于实际分数而错误剪枝
+        bounded.append((bound - penalty + SIMILARITY_BOUND_EPSILON, index, candidate, penalty))
+    bounded.sort(key=lambda item: (-item[0], item[1]))
+
+    top: list[tuple[float, int]] = []  # 小顶堆 (分数, -索引)
+    for bound, index, candidate, penalty in bounded:
+        if len(top) == top_k and (bound, -index) <= top[0]:
+            if bound < top[0][0]:
+                # 之后的候选上界都不会更高
+                break
+            continue
+        score = calculate_candidate_score(query, candidate) - penalty
+        if stats is not None:
+            stats["scored"] += 1
+        if len(top) < top_k:
+            heapq.heappush(top, (score, -index))
+        elif (score, -index) > top[0]:
+            heapq.heapreplace(top, (score, -index))
+
+    return [(score, candidates[-negative_index]) for score, negative_index in sorted(top, reverse=True)]
+
+
 CHECK_SAME_LINE_CLEAN_PATTERN = re.compile(r'[(（][^）)]*[）)]|\s+')
 
 
+def same_line_key(line: LyricsLine) -> tuple[str, str | None]:
+    """行的比较键, 键相同即is_same_line为True
+
+    去除括号内容与空白后的文本, 去除后为空时只有原文本相同才算相同
+    """
+    line_str = "".join([word[2] for word in line[2]])
+    cleaned_line = CHECK_SAME_LINE_CLEAN_PATTERN.sub('', line_str)
+    return cleaned_line, line_str if cleaned_line == "" else None
+
+
 def is_same_line(line1: LyricsLine, line2: LyricsLine) -> bool:
     """检查行是否近似相同"""
-    line1_str = "".join([word[2]for word in line1[2]])
-    line2_str = "".join([word[2]for word in line2[2]])
-    if line1_str == line2_str:
-        return True
-    cleaned_line1 = CHECK_SAME_LINE_CLEAN_PATTERN.sub('', line1_str)
-    cleaned_line2 = CHECK_SAME_LINE_CLEAN_PATTERN.sub('', line2_str)
-    return cleaned_line1 == cleaned_line2 != ""
+    return same_line_key(line1) == same_line_key(line2)
+
+
+def match_by_start_time(data1: LyricsData, data2: LyricsData) -> dict[int, int]:
+    """按起始时间匹配两组歌词行
+
+    结果与"所有行对按时间差从小到大(相同时按引索)排序, 依次匹配两行都未匹配的行对"相同:
+    先匹配起始时间相同的行, 之后每个时间只剩一组的行, 剩余行对中时间差最小的一定在相邻的两个时间之间,
+    用堆保存相邻且分属两组的时间对, 复杂度O((n+m)log(n+m))
+    :param data1: 歌词1
+    :param data2: 歌词2
+    :return: 匹配结果(引索, 按匹配顺序)
+    """
+    groups: dict[int, tuple[list[int], list[int]]] = {}
+    for i1, line in enumerate(data1):
+        if isinstance(line[0], int):
+            groups.setdefault(line[0], ([], []))[0].append(i1)
+    for i2, line in enumerate(data2):
+        if isinstance(line[0], int):
+            groups.setdefault(line[0], ([], []))[1].append(i2)
+
+    matched_pairs: list[tuple[int, int, int]] = []  # (时间差, i1, i2)
+    times: list[int] = []
+    kinds: list[int] = []  # 0: data1, 1: data2
+    indexes: list[list[int]] = []  # 未匹配的引索(倒序, 最小的在末尾)
+    for time in sorted(groups):
+        indexes1, indexes2 = groups[time]
+        matched_pairs.extend((0, i1, i2) for i1, i2 in zip(indexes1, indexes2, strict=False))
+        count = min(len(indexes1), len(indexes2))
+        rest, kind = (indexes1[count:], 0) if len(indexes1) > count else (indexes2[count:], 1)
+        if rest:
+            times.append(time)
+            kinds.append(kind)
+            indexes.append(rest[::-1])
+
+    count = len(times)
+    prev_group = list(range(-1, count - 1))
+    next_group = list(range(1, count + 1))
+    heap: list[tuple[int, int, int, int, int]] = []  # (时间差, i1, i2, 左侧时间, 右侧时间)
+
+    def push(left: int, right: int) -> None:
+        if left >= 0 and right < count and kinds[left] != kinds[right]:
+            group1, group2 = (left, right) if kinds[left] == 0 else (right, left)
+            heapq.heappush(heap, (times[right] - times[left], indexes[group1][-1], indexes[group2][-1], left, right))
+
+    for group in range(count - 1):
+        push(group, group + 1)
+
+    while heap:
+        diff, i1, i2, left, right = heapq.heappop(heap)
+        if not indexes[left] or not indexes[right] or next_group[left] != right:
+            continue
+        group1, group2 = (left, right) if kinds[left] == 0 else (right, left)
+        if indexes[group1][-1] != i1 or indexes[group2][-1] != i2:
+            continue  # 已过时
+        matched_pairs.append((diff, i1, i2))
+        indexes[group1].pop()
+        indexes[group2].pop()
+
+        for group in (left, right):
+            if not indexes[group]:
+                if prev_group[group] >= 0:
+                    next_group[prev_group[group]] = next_group[group]
+                if next_group[group] < count:
+                    prev_group[next_group[group]] = prev_group[group]
+        if not indexes[left] and not indexes[right]:
+            push(prev_group[right], next_group[right])
+        for group in (left, right):
+            if indexes[group]:
+                push(prev_group[group], group)
+                push(group, next_group[group])
+
+    return {i1: i2 for _diff, i1, i2 in sorted(matched_pairs)}
 
 
 def find_closest_match(data1: LyricsData, data2: LyricsData, data3: LyricsData | None = None, source: Source | None = None) -> dict[int, int]:
@@ -335,14 +645,15 @@ def find_closest_match(data1: LyricsData, data2: LyricsData, data3: LyricsData |
     :return: 匹配结果(引索)
     """
     if source == Source.NE and data3:
-        data3_matched = find_closest_match(data3, data2, source=Source.NE)
+        # 按行的比较键保存已匹配的data3行(按匹配顺序), 每行原文取键相同的第一个
+        data3_index: dict[tuple[str, str | None], deque[int]] = {}
+        for i3, i2 in find_closest_match(data3, data2, source=Source.NE).items():
+            data3_index.setdefault(same_line_key(data3[i3]), deque()).append(i2)
         matched = {}
         for i1, line1 in enumerate(data1):
-            for i3, i2 in data3_matched.items():
-                if is_same_line(line1, data3[i3]):
-                    matched[i1] = i2
-                    data3_matched.pop(i3)
-                    break
+            candidates = data3_index.get(same_line_key(line1))
+            if candidates:
+                matched[i1] = candidates.popleft()
         if matched:
             return matched
         matched = {}
@@ -355,18 +666,4 @@ def find_closest_match(data1: LyricsData, data2: LyricsData, data3: LyricsData |
         if len(data1) == len(data2):
             return {i: i for i in range(len(data1))}
 
-    time_difference_list = [(i1, i2, abs(s1 - s2)) for i1, (s1, e1, t1) in enumerate(data1) if isinstance(s1, int)
-                            for i2, (s2, e2, t2) in enumerate(data2) if isinstance(s2, int)]
-    time_difference_list = sorted(time_difference_list, key=lambda x: x[2])
-
-    matched = {}
-    used_i1, used_i2 = set(), set()
-    for i1, i2, _diff in time_difference_list:
-        if i1 not in used_i1 and i2 not in used_i2:
-            used_i1.add(i1)
-            used_i2.add(i2)
-            matched[i1] = i2
-            if len(used_i1) == len(data1) or len(used_i2) == len(data2):
-                break
-
-    return matched
+    return match_by_start_time(data1, data2)
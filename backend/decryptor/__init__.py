@@ -1,17 +1,106 @@
 # SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
 # SPDX-License-Identifier: GPL-3.0-only
-from zlib import decompress
+import os
+from codecs import getincrementaldecoder
+from collections.abc import Iterable, Iterator
+from zlib import compress, decompressobj
 
-from backend.decryptor.qmc1 import qmc1_decrypt
-from backend.decryptor.tripledes import DECRYPT, tripledes_crypt, tripledes_key_setup
+from backend.decryptor.qmc1 import qmc1_decrypt, qmc1_encrypt
+from backend.decryptor.tripledes import (
+    DECRYPT,
+    ENCRYPT,
+    clear_key_schedules,
+    load_key_schedules,
+    loaded_key_schedules,
+    tripledes_crypt_block,
+    tripledes_key_setup,
+)
+from backend.decryptor.xor import repeat_key, xor_bytes
 from utils.enum import QrcType
 from utils.error import LyricsDecryptError
 
 QRC_KEY = b"!@#)(*$%123ZXC!@!@#)(NHL"
 KRC_KEY = b"@Gaw^2tGQ61-\xce\xd2ni"
+QRC_MAGICHEADER = b'\x98%\xb0\xac\xe3\x02\x83h\xe8\xfcl'
+KRC_HEADER = b'krc1'
 
+# QRC_KEY的已知密文/明文块, 用于检查快照中的密钥表
+QRC_KEY_CHECK_BLOCK = (0x9825b0ace3028368, 0xf90143fb56088c94)
+
+
+def _load_key_schedule_snapshot(path: str) -> bool:
+    """加载密钥表快照, 快照损坏或与内置密钥不符时丢弃(之后重新生成密钥表)
+
+    :return: 是否使用了快照
+    """
+    try:
+        load_key_schedules(path)
+    except (OSError, ValueError):
+        clear_key_schedules()
+        return False
+
+    encrypted, decrypted = QRC_KEY_CHECK_BLOCK
+    checks = {DECRYPT: (encrypted, decrypted), ENCRYPT: (decrypted, encrypted)}
+    for (key, mode), schedule in loaded_key_schedules().items():
+        if key == QRC_KEY and tripledes_crypt_block(checks[mode][0], schedule) != checks[mode][1]:
+            clear_key_schedules()
+            return False
+    return True
+
+
+# 可选的密钥表快照(由 tripledes.save_key_schedules 生成), 用于跳过冷启动时的密钥表生成
+KEY_SCHEDULE_SNAPSHOT = os.environ.get("LDDC_KEY_SCHEDULE_SNAPSHOT")
+if KEY_SCHEDULE_SNAPSHOT and os.path.isfile(KEY_SCHEDULE_SNAPSHOT):
+    _load_key_schedule_snapshot(KEY_SCHEDULE_SNAPSHOT)
+
+
+# 流式解密时每次处理的密文长度(须为8与16的倍数)
+CHUNK_SIZE = 8192
+
+
+def _inflate(decrypted_chunks: Iterable[bytes | bytearray]) -> Iterator[str]:
+    """将解密后的数据块逐块解压并解码为文本块"""
+    try:
+        decompressor = decompressobj()
+        decoder = getincrementaldecoder("utf-8")()
+        for chunk in decrypted_chunks:
+            text = decoder.decode(decompressor.decompress(chunk))
+            if text:
+                yield text
+        text = decoder.decode(decompressor.flush(), final=True)
+    except Exception as e:
+        msg = "解密失败"
+        raise LyricsDecryptError(msg) from e
+    if not decompressor.eof:
+        msg = "解密失败"
+        raise LyricsDecryptError(msg)
+    if text:
+        yield text
+
+
+def _qrc_decrypted_chunks(encrypted_view: memoryview, chunk_size: int) -> Iterator[bytearray]:
+    schedule = tripledes_key_setup(QRC_KEY, DECRYPT)
+    for start in range(0, len(encrypted_view), chunk_size):
+        encrypted_chunk = encrypted_view[start:start + chunk_size]
+        data = bytearray(len(encrypted_chunk))
+        # 以 8 字节为单位迭代 encrypted_chunk(不复制), 结果直接写入预分配的 data
+        for i in range(0, len(encrypted_chunk), 8):
+            data[i:i + 8] = tripledes_crypt_block(int.from_bytes(encrypted_chunk[i:i + 8], "big"), schedule).to_bytes(8, "big")
+        yield data
+
+
+def qrc_decrypt_iter(encrypted_qrc: str | bytearray | bytes, qrc_type: QrcType = QrcType.CLOUD, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """流式解密qrc, 边解密边解压
+
+    :param encrypted_qrc: 加密的qrc
+    :param qrc_type: qrc类型
+    :param chunk_size: 每次解密的密文长度(须为8的倍数)
+    :return: 解密后文本块的生成器
+    """
+    if chunk_size <= 0 or chunk_size % 8 != 0:
+        msg = "chunk_size须为8的正整数倍"
+        raise ValueError(msg)
 
-def qrc_decrypt(encrypted_qrc: str | bytearray | bytes, qrc_type: QrcType = QrcType.CLOUD) -> str:
     if encrypted_qrc is None or encrypted_qrc.strip() == "":
         msg = "没有可解密的数据"
         raise LyricsDecryptError(msg)
@@ -26,40 +115,74 @@ def qrc_decrypt(encrypted_qrc: str | bytearray | bytes, qrc_type: QrcType = QrcT
         msg = "无效的加密数据类型"
         raise LyricsDecryptError(msg)
 
-    try:
-        if qrc_type == QrcType.LOCAL:
-            qmc1_decrypt(encrypted_text_byte)
-            encrypted_text_byte = encrypted_text_byte[11:]
+    encrypted_view = memoryview(encrypted_text_byte)
+    if qrc_type == QrcType.LOCAL:
+        qmc1_decrypt(encrypted_text_byte)
+        encrypted_view = encrypted_view[11:]
 
-        data = bytearray()
-        schedule = tripledes_key_setup(QRC_KEY, DECRYPT)
+    if len(encrypted_view) % 8 != 0:
+        msg = "解密失败"
+        raise LyricsDecryptError(msg)
 
-        # 以 8 字节为单位迭代 encrypted_text_byte
-        for i in range(0, len(encrypted_text_byte), 8):
-            data += tripledes_crypt(encrypted_text_byte[i:], schedule)
+    return _inflate(_qrc_decrypted_chunks(encrypted_view, chunk_size))
 
-        decrypted_qrc = decompress(data).decode("utf-8")
-    except Exception as e:
-        msg = "解密失败"
-        raise LyricsDecryptError(msg) from e
-    return decrypted_qrc
+
+def qrc_decrypt(encrypted_qrc: str | bytearray | bytes, qrc_type: QrcType = QrcType.CLOUD) -> str:
+    return "".join(qrc_decrypt_iter(encrypted_qrc, qrc_type))
 
 
-def krc_decrypt(encrypted_lyrics: bytearray | bytes) -> str:
-    if isinstance(encrypted_lyrics, bytes):
-        encrypted_data = bytearray(encrypted_lyrics)[4:]
-    elif isinstance(encrypted_lyrics, bytearray):
-        encrypted_data = encrypted_lyrics[4:]
+def _krc_decrypted_chunks(encrypted_view: memoryview, chunk_size: int) -> Iterator[bytes]:
+    for start in range(0, len(encrypted_view), chunk_size):
+        encrypted_chunk = encrypted_view[start:start + chunk_size]
+        yield xor_bytes(encrypted_chunk, repeat_key(KRC_KEY, len(encrypted_chunk), start=start % len(KRC_KEY)))
+
+
+def krc_decrypt_iter(encrypted_lyrics: bytearray | bytes, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """流式解密krc, 边解密边解压
+
+    :param encrypted_lyrics: 加密的krc
+    :param chunk_size: 每次解密的密文长度
+    :return: 解密后文本块的生成器
+    """
+    if chunk_size <= 0:
+        msg = "chunk_size须为正整数"
+        raise ValueError(msg)
+
+    if isinstance(encrypted_lyrics, bytes | bytearray):
+        encrypted_data = memoryview(encrypted_lyrics)[4:]
     else:
         msg = "无效的加密数据类型"
         raise LyricsDecryptError(msg)
 
-    try:
-        decrypted_data = bytearray()
-        for i, item in enumerate(encrypted_data):
-            decrypted_data.append(item ^ KRC_KEY[i % len(KRC_KEY)])
+    return _inflate(_krc_decrypted_chunks(encrypted_data, chunk_size))
 
-        return decompress(decrypted_data).decode('utf-8')
-    except Exception as e:
-        msg = "解密失败"
-        raise LyricsDecryptError(msg) from e
+
+def krc_decrypt(encrypted_lyrics: bytearray | bytes) -> str:
+    return "".join(krc_decrypt_iter(encrypted_lyrics))
+
+
+def qrc_encrypt(qrc: str, qrc_type: QrcType = QrcType.CLOUD) -> bytes:
+    """加密qrc(qrc_decrypt的逆运算)
+
+    :param qrc: 明文qrc
+    :param qrc_type: qrc类型(CLOUD的结果可用.hex()转换为接口返回的格式)
+    :return: 加密后的qrc
+    """
+    data = compress(qrc.encode("utf-8"))
+    data += b"\0" * (-len(data) % 8)
+    schedule = tripledes_key_setup(QRC_KEY, ENCRYPT)
+    encrypted = bytearray(len(data))
+    for i in range(0, len(data), 8):
+        encrypted[i:i + 8] = tripledes_crypt_block(int.from_bytes(data[i:i + 8], "big"), schedule).to_bytes(8, "big")
+
+    if qrc_type == QrcType.LOCAL:
+        encrypted = bytearray(QRC_MAGICHEADER) + encrypted
+        qmc1_encrypt(encrypted)
+        encrypted[:len(QRC_MAGICHEADER)] = QRC_MAGICHEADER
+    return bytes(encrypted)
+
+
+def krc_encrypt(krc: str) -> bytes:
+    """加密krc(krc_decrypt的逆运算)"""
+    data = compress(krc.encode("utf-8"))
+    return KRC_HEADER + xor_bytes(data, repeat_key(KRC_KEY, len(data)))
@@ -5,9 +5,13 @@ import binascii
 import hashlib
 import json
 from base64 import b64decode, b64encode
+from collections.abc import Iterable
+from functools import lru_cache
 
 from pyaes import AESModeOfOperationECB
 
+EAPI_KEY = b'e82ckenh8dichen8'
+
 
 def pkcs7_pad(data: bytes, block_size: int = 16) -> bytes:
     pad_len = block_size - (len(data) % block_size)
@@ -23,23 +27,66 @@ def pkcs7_unpad(data: bytes) -> bytes:
     return data[:-pad_len]
 
 
+@lru_cache(maxsize=8)
+def get_aes(key: bytes) -> AESModeOfOperationECB:
+    """获取密钥对应的AES对象(ECB模式无状态, 同一密钥复用同一对象)"""
+    return AESModeOfOperationECB(key)
+
+
+def aes_ecb_crypt(data: bytes | bytearray | memoryview, key: bytes, encrypt: bool) -> bytearray:
+    """以16字节分组批量加/解密, 结果写入预分配的bytearray
+
+    :param data: 数据(长度须为16的倍数)
+    :param key: 密钥
+    :param encrypt: True为加密, False为解密
+    :return: 结果
+    """
+    view = memoryview(data)
+    if len(view) % 16 != 0:
+        msg = "Data length must be a multiple of 16."
+        raise ValueError(msg)
+    aes = get_aes(key)
+    crypt = aes.encrypt if encrypt else aes.decrypt
+    result = bytearray(len(view))
+    for i in range(0, len(view), 16):
+        result[i:i + 16] = crypt(view[i:i + 16].tobytes())
+    return result
+
+
+class AESECBStreamDecryptor:
+    """流式AES-ECB解密, 可在数据到达时逐块解密"""
+
+    def __init__(self, key: bytes) -> None:
+        self.key = key
+        self.buffer = bytearray()
+
+    def update(self, chunk: bytes | bytearray | memoryview) -> bytearray:
+        """解密已到达的完整分组(保留最后一个分组以便去除填充)"""
+        self.buffer += chunk
+        size = (len(self.buffer) - 1) // 16 * 16
+        if size <= 0:
+            return bytearray()
+        data = self.buffer
+        self.buffer = data[size:]
+        return aes_ecb_crypt(memoryview(data)[:size], self.key, encrypt=False)
+
+    def finalize(self) -> bytearray:
+        """解密最后一个分组并去除填充"""
+        if len(self.buffer) != 16:
+            msg = "Data length must be a multiple of 16."
+            raise ValueError(msg)
+        return pkcs7_unpad(aes_ecb_crypt(self.buffer, self.key, encrypt=False))
+
+
 def aes_encrypt(data: str | bytes, key: bytes) -> bytes:
     if isinstance(data, str):
         data = data.encode()
     padded_data = pkcs7_pad(data)  # Ensure the data is padded
-    aes = AESModeOfOperationECB(key)  # Using ECB mode
-    encrypted_data = b''
-    for i in range(0, len(padded_data), 16):
-        encrypted_data += aes.encrypt(padded_data[i:i + 16])  # Encrypt in 16-byte blocks
-    return encrypted_data
+    return bytes(aes_ecb_crypt(padded_data, key, encrypt=True))
 
 
 def aes_decrypt(cipher_buffer: bytes, key: bytes) -> bytes:
-    aes = AESModeOfOperationECB(key)  # Using ECB mode
-    decrypted_data = b''
-    for i in range(0, len(cipher_buffer), 16):
-        decrypted_data += aes.decrypt(cipher_buffer[i:i + 16])  # Decrypt in 16-byte blocks
-    return pkcs7_unpad(decrypted_data)  # Remove padding after decryption
+    return bytes(pkcs7_unpad(aes_ecb_crypt(cipher_buffer, key, encrypt=False)))  # Remove padding after decryption
 
 
 def eapi_params_encrypt(path: bytes, params: dict) -> str:
@@ -53,7 +100,7 @@ def eapi_params_encrypt(path: bytes, params: dict) -> str:
     sign_src = b'nobody' + path + b'use' + params_bytes + b'md5forencrypt'
     sign = hashlib.md5(sign_src).hexdigest()  # noqa: S324
     aes_src = path + b'-36cd479b6b5-' + params_bytes + b'-36cd479b6b5-' + sign.encode()
-    encrypted_data = aes_encrypt(aes_src, b'e82ckenh8dichen8')
+    encrypted_data = aes_encrypt(aes_src, EAPI_KEY)
     return f"params={binascii.hexlify(encrypted_data).upper().decode()}"
 
 
@@ -64,7 +111,7 @@ def eapi_params_decrypt(encrypted_text: str) -> dict:
     :return: 解密后的 dict 对象
     """
     encrypted_bytes = binascii.unhexlify(encrypted_text)
-    decrypted_data = aes_decrypt(encrypted_bytes, b'e82ckenh8dichen8')
+    decrypted_data = aes_decrypt(encrypted_bytes, EAPI_KEY)
     decrypted_text = decrypted_data.decode()
     parts = decrypted_text.split('-36cd479b6b5-')
     path = parts[0].encode()
@@ -83,5 +130,18 @@ def cache_key_decrypt(data: str | bytes) -> str:
     return aes_decrypt(b64decode(data), b")(13daqP@ssw0rd~").decode()
 
 
-def eapi_response_decrypt(cipher_buffer: bytes) -> bytes:
-    return aes_decrypt(cipher_buffer, b'e82ckenh8dichen8')
+def eapi_response_decrypt(cipher_buffer: bytes | Iterable[bytes]) -> bytes:
+    """解密eapi响应
+
+    :param cipher_buffer: 完整的响应数据, 或按到达顺序产生响应数据块的可迭代对象
+    :return: 明文
+    """
+    if isinstance(cipher_buffer, bytes | bytearray | memoryview):
+        return aes_decrypt(cipher_buffer, EAPI_KEY)
+
+    decryptor = AESECBStreamDecryptor(EAPI_KEY)
+    result = bytearray()
+    for chunk in cipher_buffer:
+        result += decryptor.update(chunk)
+    result += decryptor.finalize()
+    return bytes(result)
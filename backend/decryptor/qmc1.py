@@ -3,6 +3,7 @@
 
 # SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
 # SPDX-License-Identifier: GPL-3.0-only
+from backend.decryptor.xor import repeat_key, xor_bytes
 
 PRIVKEY = (
     0xc3, 0x4a, 0xd6, 0xca, 0x90, 0x67, 0xf7, 0x52,
@@ -31,6 +32,22 @@ PRIVKEY = (
 )
 
 
+# 前 0x8000 字节的密钥为 PRIVKEY[i & 0x7F], 之后为 PRIVKEY[(i % 0x7FFF) & 0x7F](以 0x7FFF 为周期)
+_HEAD_KEYSTREAM = repeat_key(bytes(PRIVKEY), 0x8000)
+_PERIOD_KEYSTREAM = _HEAD_KEYSTREAM[:0x7FFF]
+
+
+def qmc1_keystream(length: int) -> bytes:
+    """生成长度为length的密钥流"""
+    if length <= 0x8000:
+        return _HEAD_KEYSTREAM[:length]
+    return _HEAD_KEYSTREAM + repeat_key(_PERIOD_KEYSTREAM, length - 0x8000, start=0x8000 % 0x7FFF)
+
+
 def qmc1_decrypt(data: bytearray) -> None:
-    for i, _value in enumerate(data):
-        data[i] ^= PRIVKEY[(i % 0x7FFF) & 0x7F] if i > 0x7FFF else PRIVKEY[i & 0x7F]
+    data[:] = xor_bytes(data, qmc1_keystream(len(data)))
+
+
+def qmc1_encrypt(data: bytearray) -> None:
+    # 异或加密与解密相同
+    qmc1_decrypt(data)
@@ -4,6 +4,9 @@
 
 # SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
 # SPDX-License-Identifier: GPL-3.0-only
+import json
+from collections.abc import Callable
+
 # from utils.cache import cache
 
 ENCRYPT = 1
@@ -157,7 +160,12 @@ def inverse_permutation(s0: int, s1: int) -> bytearray:
     return data
 
 
-def f(state: int, key: list[int]) -> int:
+def expansion(state: int) -> tuple[int, int, int, int, int, int]:
+    """扩展置换(32位 -> 48位)
+
+    :param state: 32位整数
+    :return: 6个字节
+    """
     # 提取位并左移
     t1 = (bitnum_intl(state, 31, 0) | ((state & 0xf0000000) >> 1) | bitnum_intl(state, 4, 5) |
           bitnum_intl(state, 3, 6) | ((state & 0x0f000000) >> 3) | bitnum_intl(state, 8, 11) |
@@ -170,25 +178,26 @@ def f(state: int, key: list[int]) -> int:
           bitnum_intl(state, 27, 18) | ((state & 0x0000000f) << 9) | bitnum_intl(state, 0, 23))
 
     # 将 t1 和 t2 的位组合到 lrgstate 中
-    lrgstate = (
+    return (
         (t1 >> 24) & 0x000000ff, (t1 >> 16) & 0x000000ff, (t1 >> 8) & 0x000000ff,
         (t2 >> 24) & 0x000000ff, (t2 >> 16) & 0x000000ff, (t2 >> 8) & 0x000000ff,
     )
 
-    # 与密钥进行异或运算
-    lrgstate = [lrgstate[i] ^ key[i] for i in range(6)]
-
-    # S盒操作
-    state = ((sbox[0][sbox_bit(lrgstate[0] >> 2)] << 28) |
-             (sbox[1][sbox_bit(((lrgstate[0] & 0x03) << 4) | (lrgstate[1] >> 4))] << 24) |
-             (sbox[2][sbox_bit(((lrgstate[1] & 0x0f) << 2) | (lrgstate[2] >> 6))] << 20) |
-             (sbox[3][sbox_bit(lrgstate[2] & 0x3f)] << 16) |
-             (sbox[4][sbox_bit(lrgstate[3] >> 2)] << 12) |
-             (sbox[5][sbox_bit(((lrgstate[3] & 0x03) << 4) | (lrgstate[4] >> 4))] << 8) |
-             (sbox[6][sbox_bit(((lrgstate[4] & 0x0f) << 2) | (lrgstate[5] >> 6))] << 4) |
-             sbox[7][sbox_bit(lrgstate[5] & 0x3f)])
-
-    # 位运算
+
+def substitution(lrgstate: list[int]) -> int:
+    """S盒替换(48位 -> 32位)"""
+    return ((sbox[0][sbox_bit(lrgstate[0] >> 2)] << 28) |
+            (sbox[1][sbox_bit(((lrgstate[0] & 0x03) << 4) | (lrgstate[1] >> 4))] << 24) |
+            (sbox[2][sbox_bit(((lrgstate[1] & 0x0f) << 2) | (lrgstate[2] >> 6))] << 20) |
+            (sbox[3][sbox_bit(lrgstate[2] & 0x3f)] << 16) |
+            (sbox[4][sbox_bit(lrgstate[3] >> 2)] << 12) |
+            (sbox[5][sbox_bit(((lrgstate[3] & 0x03) << 4) | (lrgstate[4] >> 4))] << 8) |
+            (sbox[6][sbox_bit(((lrgstate[4] & 0x0f) << 2) | (lrgstate[5] >> 6))] << 4) |
+            sbox[7][sbox_bit(lrgstate[5] & 0x3f)])
+
+
+def permutation(state: int) -> int:
+    """P置换"""
     return (bitnum_intl(state, 15, 0) | bitnum_intl(state, 6, 1) | bitnum_intl(state, 19, 2) |
             bitnum_intl(state, 20, 3) | bitnum_intl(state, 28, 4) | bitnum_intl(state, 11, 5) |
             bitnum_intl(state, 27, 6) | bitnum_intl(state, 16, 7) | bitnum_intl(state, 0, 8) |
@@ -202,6 +211,13 @@ def f(state: int, key: list[int]) -> int:
             bitnum_intl(state, 3, 30) | bitnum_intl(state, 24, 31))
 
 
+def f(state: int, key: list[int]) -> int:
+    # 与密钥进行异或运算
+    lrgstate = [b ^ k for b, k in zip(expansion(state), key, strict=True)]
+    # S盒操作与位运算
+    return permutation(substitution(lrgstate))
+
+
 def crypt(input_data: bytearray, key: list) -> bytearray:
     s0, s1 = initial_permutation(input_data)  # 初始置换
 
@@ -243,8 +259,8 @@ def key_schedule(key: bytes, mode: int) -> list[list[int]]:
     return schedule
 
 
-# @cache.memoize()
-def tripledes_key_setup(key: bytes, mode: int) -> list[list[list[int]]]:
+def key_setup(key: bytes, mode: int) -> list[list[list[int]]]:
+    """生成逐位实现(crypt)使用的三重DES密钥表"""
     if mode == ENCRYPT:
         return [key_schedule(key[0:], ENCRYPT),
                 key_schedule(key[8:], DECRYPT),
@@ -254,7 +270,146 @@ def tripledes_key_setup(key: bytes, mode: int) -> list[list[list[int]]]:
             key_schedule(key[0:], DECRYPT)]
 
 
-def tripledes_crypt(data: bytearray, key: list) -> bytearray:
-    for i in range(3):
-        data = crypt(data, key[i])
-    return data
+# 查表实现
+# 以上逐位实现的各个置换都是位置换(每个输出位只来自一个输入位),
+# 因此可以按8位(S盒为6位)一组预先计算每组输入对输出的贡献,运行时只需查表并按位或
+
+
+def _bit_map(func: Callable[[int], int], width: int) -> list[int]:
+    """获取置换中每个输入位对应的输出(第i项为仅第i位(从低位数起)为1时的输出)"""
+    return [func(1 << i) for i in range(width)]
+
+
+def _chunk_tables(bit_map: list[int], chunk_bits: int = 8) -> tuple[tuple[int, ...], ...]:
+    """将位置换拆分为每组chunk_bits位的查找表(从高位组开始)"""
+    tables = []
+    for shift in range(len(bit_map) - chunk_bits, -1, -chunk_bits):
+        table = [0] * (1 << chunk_bits)
+        for value in range(1, 1 << chunk_bits):
+            low_bit = (value & -value).bit_length() - 1
+            table[value] = table[value & (value - 1)] | bit_map[shift + low_bit]
+        tables.append(tuple(table))
+    return tuple(tables)
+
+
+def _ip_int(block: int) -> int:
+    s0, s1 = initial_permutation(block.to_bytes(8, "big"))
+    return s0 << 32 | s1
+
+
+def _fp_int(state: int) -> int:
+    return int.from_bytes(inverse_permutation(state >> 32, state & 0xffffffff), "big")
+
+
+def _expansion_int(state: int) -> int:
+    return int.from_bytes(bytes(expansion(state)), "big")
+
+
+# 初始置换: 8字节(大端整数) -> s0 << 32 | s1
+IP_TABLES = _chunk_tables(_bit_map(_ip_int, 64))
+# 逆置换: s0 << 32 | s1 -> 8字节(大端整数)
+FP_TABLES = _chunk_tables(_bit_map(_fp_int, 64))
+# 扩展置换: 32位 -> 48位
+E_TABLES = _chunk_tables(_bit_map(_expansion_int, 32))
+# S盒与P置换合并: 每个S盒的6位输入 -> 32位输出
+SP_TABLES = tuple(tuple(permutation(sbox[i][sbox_bit(value)] << (28 - 4 * i)) for value in range(64)) for i in range(8))
+
+
+def _des_rounds(s0: int, s1: int, round_keys: tuple[int, ...]) -> tuple[int, int]:
+    """16轮运算(不含初始置换与逆置换)"""
+    e0, e1, e2, e3 = E_TABLES
+    sp0, sp1, sp2, sp3, sp4, sp5, sp6, sp7 = SP_TABLES
+    for k in round_keys:
+        e = (e0[s1 >> 24] | e1[(s1 >> 16) & 0xff] | e2[(s1 >> 8) & 0xff] | e3[s1 & 0xff]) ^ k
+        s0, s1 = s1, s0 ^ (sp0[e >> 42] | sp1[(e >> 36) & 0x3f] | sp2[(e >> 30) & 0x3f] | sp3[(e >> 24) & 0x3f] |
+                           sp4[(e >> 18) & 0x3f] | sp5[(e >> 12) & 0x3f] | sp6[(e >> 6) & 0x3f] | sp7[e & 0x3f])
+    # 最后一轮不交换
+    return s1, s0
+
+
+def tripledes_crypt_block(block: int, key: tuple[tuple[int, ...], ...]) -> int:
+    """加/解密一个分组
+
+    :param block: 8字节分组(大端整数)
+    :param key: tripledes_key_setup生成的密钥表
+    :return: 结果分组(大端整数)
+    """
+    ip0, ip1, ip2, ip3, ip4, ip5, ip6, ip7 = IP_TABLES
+    state = (ip0[block >> 56] | ip1[(block >> 48) & 0xff] | ip2[(block >> 40) & 0xff] | ip3[(block >> 32) & 0xff] |
+             ip4[(block >> 24) & 0xff] | ip5[(block >> 16) & 0xff] | ip6[(block >> 8) & 0xff] | ip7[block & 0xff])
+    s0, s1 = state >> 32, state & 0xffffffff
+
+    # 逆置换与初始置换互逆,三次DES之间无需置换
+    for round_keys in key:
+        s0, s1 = _des_rounds(s0, s1, round_keys)
+
+    fp0, fp1, fp2, fp3, fp4, fp5, fp6, fp7 = FP_TABLES
+    return (fp0[s0 >> 24] | fp1[(s0 >> 16) & 0xff] | fp2[(s0 >> 8) & 0xff] | fp3[s0 & 0xff] |
+            fp4[s1 >> 24] | fp5[(s1 >> 16) & 0xff] | fp6[(s1 >> 8) & 0xff] | fp7[s1 & 0xff])
+
+
+# 已生成的密钥表 {(key, mode): 密钥表}
+_key_schedules: dict[tuple[bytes, int], tuple[tuple[int, ...], ...]] = {}
+
+
+def tripledes_key_setup(key: bytes, mode: int) -> tuple[tuple[int, ...], ...]:
+    """生成三重DES密钥表(每轮子密钥为48位整数), 同一(key, mode)只生成一次"""
+    cache_key = (bytes(key), mode)
+    schedule = _key_schedules.get(cache_key)
+    if schedule is None:
+        schedule = tuple(tuple(int.from_bytes(bytes(round_key), "big") for round_key in stage) for stage in key_setup(key, mode))
+        _key_schedules[cache_key] = schedule
+    return schedule
+
+
+def save_key_schedules(path: str) -> None:
+    """将已生成的密钥表保存为JSON快照"""
+    snapshot = {
+        "version": 0,
+        "schedules": [{"key": key.hex(), "mode": mode, "schedule": schedule} for (key, mode), schedule in _key_schedules.items()],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+
+
+def load_key_schedules(path: str) -> int:
+    """从JSON快照加载密钥表
+
+    :param path: 快照路径
+    :return: 加载的密钥表数量
+    """
+    with open(path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+
+    if not isinstance(snapshot, dict) or snapshot.get("version") != 0 or not isinstance(snapshot.get("schedules"), list):
+        msg = "密钥表快照格式不正确"
+        raise ValueError(msg)
+
+    loaded = {}
+    try:
+        for item in snapshot["schedules"]:
+            schedule = tuple(tuple(int(round_key) for round_key in stage) for stage in item["schedule"])
+            if item["mode"] not in (ENCRYPT, DECRYPT) or len(schedule) != 3 or any(len(stage) != 16 for stage in schedule):
+                msg = "密钥表快照格式不正确"
+                raise ValueError(msg)
+            loaded[(bytes.fromhex(item["key"]), item["mode"])] = schedule
+    except (KeyError, TypeError, AttributeError) as e:
+        msg = "密钥表快照格式不正确"
+        raise ValueError(msg) from e
+    _key_schedules.update(loaded)
+    return len(loaded)
+
+
+def loaded_key_schedules() -> dict[tuple[bytes, int], tuple[tuple[int, ...], ...]]:
+    """已生成或加载的密钥表(副本) {(key, mode): 密钥表}"""
+    return dict(_key_schedules)
+
+
+def clear_key_schedules() -> None:
+    """清空已生成或加载的密钥表(之后重新生成)"""
+    _key_schedules.clear()
+
+
+def tripledes_crypt(data: bytearray | bytes | memoryview, key: tuple[tuple[int, ...], ...]) -> bytearray:
+    """加/解密data的前8字节"""
+    return bytearray(tripledes_crypt_block(int.from_bytes(data[:8], "big"), key).to_bytes(8, "big"))
@@ -0,0 +1,29 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def repeat_key(key: bytes, length: int, start: int = 0) -> bytes:
+    """生成由key循环组成的密钥流
+
+    :param key: 密钥
+    :param length: 密钥流长度
+    :param start: 密钥流在key中的起始位置
+    :return: 密钥流
+    """
+    if start:
+        key = key[start:] + key[:start]
+    return (key * (length // len(key) + 1))[:length]
+
+
+def xor_bytes(data: bytes | bytearray | memoryview, keystream: bytes) -> bytes:
+    """将data与等长的密钥流整体异或(有NumPy时使用NumPy, 否则使用大整数异或)"""
+    length = len(data)
+    if length == 0:
+        return b""
+    if np is not None:
+        return np.bitwise_xor(np.frombuffer(data, dtype=np.uint8), np.frombuffer(keystream, dtype=np.uint8, count=length)).tobytes()
+    return (int.from_bytes(data, "big") ^ int.from_bytes(keystream[:length], "big")).to_bytes(length, "big")
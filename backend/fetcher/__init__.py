@@ -3,7 +3,7 @@
 from types import UnionType
 from typing import get_args
 
-from backend.lyrics import Lyrics, LyricsData
+from backend.lyrics import Lyrics
 # from utils.cache import cache
 from utils.enum import Source
 from utils.error import LyricsUnavailableError
@@ -13,7 +13,6 @@ from .kg import get_lyrics as kg_get_lyrics
 from .local import get_lyrics as local_get_lyrics
 from .ne import get_lyrics as ne_get_lyrics
 from .qm import get_lyrics as qm_get_lyrics
-from .share import judge_lyrics_type
 
 
 def is_verbatim(lrc_list: list) -> bool:
@@ -121,10 +120,6 @@ def get_lyrics(
         msg = "没有获取到可用的歌词"
         raise LyricsUnavailableError(msg)
 
-    for key, lyric in lyrics.items():
-        lyric: LyricsData
-        lyrics.types[key] = judge_lyrics_type(lyric)
-
     # 缓存歌词
     # if source != Source.Local:
         # cache.set(cache_key, lyrics, expire=14400)
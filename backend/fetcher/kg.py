@@ -1,51 +1,24 @@
 # SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
 # SPDX-License-Identifier: GPL-3.0-only
 import json
-import re
 from base64 import b64decode
+from collections.abc import Iterable
 
 from backend.api import kg_get_lyrics
-from backend.decryptor import krc_decrypt
+from backend.decryptor import krc_decrypt_iter
 from backend.lyrics import Lyrics, LyricsData, LyricsLine, LyricsWord, MultiLyricsData
+from utils.utils import iter_lines
 
+from .share import KRC_FORMAT, verbatim2list
 
-def krc2dict(krc: str) -> tuple[dict, dict]:
-    """将明文krc转换为字典{歌词类型: [(行起始时间, 行结束时间, [(字起始时间, 字结束时间, 字内容)])]}."""
-    lrc_dict = MultiLyricsData({})
-    tag_split_pattern = re.compile(r"^\[(\w+):([^\]]*)\]$")
-    tags: dict[str, str] = {}
 
-    line_split_pattern = re.compile(r'^\[(\d+),(\d+)\](.*)$')  # 逐行匹配
-    wrods_split_pattern = re.compile(r'(?:\[\d+,\d+\])?<(\d+),(\d+),\d+>((?:.(?!\d+,\d+,\d+>))*)')  # 逐字匹配
-    orig_list = LyricsData([])  # 原文歌词
+def krc2dict(krc: str | Iterable[str]) -> tuple[dict, dict]:
+    """将明文krc(或krc_decrypt_iter产生的文本块)转换为字典{歌词类型: [(行起始时间, 行结束时间, [(字起始时间, 字结束时间, 字内容)])]}."""
+    lrc_dict = MultiLyricsData({})
+    tags, orig_list = verbatim2list(krc.splitlines() if isinstance(krc, str) else iter_lines(krc), KRC_FORMAT)  # 原文歌词
     roma_list = LyricsData([])
     ts_list = LyricsData([])
 
-    for i in krc.splitlines():
-        line = i.strip()
-        if not line.startswith("["):
-            continue
-
-        tag_split_content = re.findall(tag_split_pattern, line)
-        if tag_split_content:  # 标签行
-            tags.update({tag_split_content[0][0]: tag_split_content[0][1]})
-            continue
-
-        line_split_content = re.findall(line_split_pattern, line)
-        if not line_split_content:
-            continue
-        line_start_time, line_duration, line_content = line_split_content[0]
-        orig_list.append(LyricsLine((int(line_start_time), int(line_start_time) + int(line_duration), [])))
-
-        wrods_split_content = re.findall(wrods_split_pattern, line_content)
-        if not wrods_split_content:
-            orig_list[-1][2].append(LyricsWord((int(line_start_time), int(line_start_time) + int(line_duration), line_content)))
-            continue
-
-        for word_start_time, word_duration, word_content in wrods_split_content:
-            orig_list[-1][2].append(LyricsWord((int(line_start_time) + int(word_start_time),
-                                    int(line_start_time) + int(word_start_time) + int(word_duration), word_content)))
-
     if "language" in tags and tags["language"].strip() != "":
         languages = json.loads(b64decode(tags["language"].strip()))
         for language in languages["content"]:
@@ -80,5 +53,5 @@ def get_lyrics(lyrics: Lyrics) -> None:
     if not lyrics.id or not lyrics.accesskey:
         return
     encrypted_krc = kg_get_lyrics(lyrics.id, lyrics.accesskey)
-    lyrics.tags, lyric = krc2dict(krc_decrypt(encrypted_krc))
+    lyrics.tags, lyric = krc2dict(krc_decrypt_iter(encrypted_krc))
     lyrics.update(lyric)
@@ -3,18 +3,25 @@
 import json
 import os
 import re
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
 
+from backend.decryptor import QRC_MAGICHEADER
 from backend.lyrics import Lyrics
 from utils.enum import QrcType, Source
-from utils.error import LyricsFormatError, LyricsNotFoundError, LyricsProcessingError
+from utils.error import LyricsFormatError, LyricsNotFoundError, LyricsProcessingError, LyricsUnavailableError
 from utils.utils import read_unknown_encoding_file
 
-from .kg import krc2dict, krc_decrypt
+from .kg import krc2dict, krc_decrypt_iter
 from .qm import qrc_decrypt, qrc_str_parse
 from .share import lrc2dict
 
-QRC_MAGICHEADER = b'\x98%\xb0\xac\xe3\x02\x83h\xe8\xfcl'
 KRC_MAGICHEADER = b'krc18'
+QRC_PATH_PATTERN = re.compile(r"^(?P<prefix>.*)_qm(?P<qrc_type>Roma|ts)?\.qrc$")
+QRC_NAME_PATTERN = re.compile(r"^(?P<prefix>.*)_qm(?:roma|ts)?\.qrc$")  # 匹配小写的文件名(扫描时不区分大小写)
+BULK_PENDING_PER_WORKER = 4  # bulk_get_lyrics每个进程最多排队的任务数
 
 
 def json2lyrics(json_data: dict, lyrics: Lyrics) -> None:
@@ -87,7 +94,7 @@ def get_lyrics(lyrics: Lyrics, path: str | None, data: bytes | None = None) -> N
         # QRC歌词格式
 
         # 做到打开任意qrc文件都会读取同一首歌其他类型的qrc
-        qrc_path = re.search(r"^(?P<prefix>.*)_qm(?P<qrc_type>Roma|ts)?\.qrc$", path)
+        qrc_path = QRC_PATH_PATTERN.search(path)
         if qrc_path:
             qrc_types = {qrc_path.group("qrc_type"): data, **{k: None for k in ("", "Roma", "ts") if k != qrc_path.group("qrc_type")}}
             for qrc_type, qrc_data in qrc_types.items():
@@ -115,7 +122,7 @@ def get_lyrics(lyrics: Lyrics, path: str | None, data: bytes | None = None) -> N
 
     elif data.startswith(KRC_MAGICHEADER):
         # KRC歌词格式
-        lyrics.tags, multi_lyrics_data = krc2dict(krc_decrypt(data))
+        lyrics.tags, multi_lyrics_data = krc2dict(krc_decrypt_iter(data))
         lyrics.update(multi_lyrics_data)
 
     else:
@@ -134,3 +141,87 @@ def get_lyrics(lyrics: Lyrics, path: str | None, data: bytes | None = None) -> N
                 except UnicodeDecodeError:
                     msg = f"不支持的歌词格式: {path}"
                     raise LyricsFormatError(msg) from UnicodeDecodeError
+
+
+def scan_local_lyrics(directory: str, recursive: bool = False) -> list[str]:
+    """扫描目录中的加密歌词(qrc与krc)
+
+    同一首歌的qrc(原文/罗马音/翻译)只返回其中一个路径, get_lyrics会读取同组的其他qrc
+    :param directory: 目录
+    :param recursive: 是否扫描子目录
+    :return: 歌词路径列表
+    """
+    paths = []
+    qrc_prefixes = set()
+    directories = [directory]
+    while directories:
+        current = directories.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):  # 不跟随符号链接, 避免循环
+                    if recursive:
+                        directories.append(entry.path)
+                    continue
+
+                name = entry.name.lower()
+                if name.endswith(".krc"):
+                    paths.append(entry.path)
+                    continue
+                qrc_name = QRC_NAME_PATTERN.search(name)
+                if qrc_name:
+                    prefix = os.path.join(current, qrc_name.group("prefix"))
+                    if prefix not in qrc_prefixes:
+                        qrc_prefixes.add(prefix)
+                        paths.append(entry.path)
+    return paths
+
+
+def _bulk_get_lyrics_worker(path: str) -> Lyrics:
+    lyrics = Lyrics({"source": Source.Local})
+    get_lyrics(lyrics, path=path)
+    if not lyrics:
+        msg = "没有获取到可用的歌词"
+        raise LyricsUnavailableError(msg)
+    return lyrics
+
+
+def bulk_get_lyrics(directory: str,
+                    recursive: bool = False,
+                    max_workers: int | None = None,
+                    progress: Callable[[int, int, float], None] | None = None) -> Iterator[tuple[str, Lyrics | Exception]]:
+    """在多个进程中批量解密解析目录中的加密歌词
+
+    :param directory: 目录
+    :param recursive: 是否扫描子目录
+    :param max_workers: 最大进程数(默认为CPU核心数)
+    :param progress: 进度回调(已完成数, 总数, 每秒完成数)
+    :return: 按完成顺序产生(歌词路径, 歌词或错误)
+    """
+    paths = scan_local_lyrics(directory, recursive)
+    start_time = time.perf_counter()
+    # 限制同时提交的任务数: 已完成的结果产出后即释放, 调用方停止迭代时只需等待少量正在进行的任务
+    max_pending = (max_workers or os.cpu_count() or 1) * BULK_PENDING_PER_WORKER
+    remaining = iter(paths)
+    pending: dict[Future[Lyrics], str] = {}
+    done = 0
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        while True:
+            for path in islice(remaining, max_pending - len(pending)):
+                pending[executor.submit(_bulk_get_lyrics_worker, path)] = path
+            if not pending:
+                break
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                done += 1
+                if progress:
+                    progress(done, len(paths), done / max(time.perf_counter() - start_time, 1e-9))
+                yield path, result
+    finally:
+        executor.shutdown(cancel_futures=True)
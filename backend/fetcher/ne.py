@@ -1,41 +1,24 @@
 # SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
 # SPDX-License-Identifier: GPL-3.0-only\
-import re
 
 from backend.api import ne_get_lyrics
-from backend.lyrics import Lyrics, LyricsData, LyricsLine, LyricsWord
+from backend.lyrics import Lyrics, LyricsData
 from utils.enum import Source
 from utils.error import LyricsRequestError
 
-from .share import lrc2list, plaintext2list
+from .share import YRC_FORMAT, lrc2list, plaintext2list, verbatim2list
 
 
-def yrc2list(yrc: str) -> list:
+def yrc2list(yrc: str) -> LyricsData:
     """将yrc转换为列表[(行起始时间, 行结束时间, [(字起始时间, 字结束时间, 字内容)])]"""
-    lrc_list = LyricsData([])
+    return verbatim2list(yrc.splitlines(), YRC_FORMAT)[1]
 
-    line_split_pattern = re.compile(r'^\[(\d+),(\d+)\](.*)$')  # 逐行匹配
-    wrods_split_pattern = re.compile(r'(?:\[\d+,\d+\])?\((\d+),(\d+),\d+\)((?:.(?!\d+,\d+,\d+\)))*)')  # 逐字匹配
-    for i in yrc.splitlines():
-        line = i.strip()
-        if not line.startswith("["):
-            continue
-
-        line_split_content = re.findall(line_split_pattern, line)
-        if not line_split_content:
-            continue
-        line_start_time, line_duration, line_content = line_split_content[0]
-        lrc_list.append(LyricsLine((int(line_start_time), int(line_start_time) + int(line_duration), [])))
-
-        wrods_split_content = re.findall(wrods_split_pattern, line_content)
-        if not wrods_split_content:
-            lrc_list[-1][2].append(LyricsWord((int(line_start_time), int(line_start_time) + int(line_duration), line_content)))
-            continue
-
-        for word_start_time, word_duration, word_content in wrods_split_content:
-            lrc_list[-1][2].append(LyricsWord((int(word_start_time), int(word_start_time) + int(word_duration), word_content)))
 
-    return lrc_list
+def lrc_str2list(lyric: str) -> LyricsData:
+    """将网易云的lrc(或纯文本)歌词转换为列表"""
+    if "[" in lyric and "]" in lyric:
+        return lrc2list(lyric, source=Source.NE)[1]
+    return plaintext2list(lyric)
 
 
 def get_lyrics(lyrics: Lyrics) -> None:
@@ -71,9 +54,5 @@ def get_lyrics(lyrics: Lyrics) -> None:
         if value not in response:
             continue
         if isinstance(response[value]['lyric'], str) and len(response[value]['lyric']) != 0:
-            if value == 'yrc':
-                lyrics[key] = yrc2list(response[value]['lyric'])
-            elif "[" in response[value]['lyric'] and "]" in response[value]['lyric']:
-                lyrics[key] = lrc2list(response[value]['lyric'], source=Source.NE)[1]
-            else:
-                lyrics[key] = plaintext2list(response[value]['lyric'])
+            # 在首次访问时才解析
+            lyrics.set_lazy(key, response[value]['lyric'], yrc2list if value == 'yrc' else lrc_str2list)
@@ -4,11 +4,11 @@ import re
 
 from backend.api import qm_get_lyrics
 from backend.decryptor import qrc_decrypt
-from backend.lyrics import Lyrics, LyricsData, LyricsLine, LyricsWord
+from backend.lyrics import Lyrics, LyricsData
 from utils.enum import QrcType
 from utils.error import LyricsProcessingError, LyricsRequestError
 
-from .share import lrc2list, plaintext2list
+from .share import QRC_FORMAT, lrc2list, plaintext2list, verbatim2list
 
 QRC_PATTERN = re.compile(r'<Lyric_1 LyricType="1" LyricContent="(?P<content>.*?)"/>', re.DOTALL)
 
@@ -19,33 +19,7 @@ def qrc2list(s_qrc: str) -> tuple[dict, LyricsData]:
     if not m_qrc or not m_qrc.group("content"):
         msg = "不支持的歌词格式"
         raise LyricsProcessingError(msg)
-    qrc: str = m_qrc.group("content")
-    qrc_lines = qrc.split('\n')
-    tags = {}
-    lrc_list = LyricsData([])
-    wrods_split_pattern = re.compile(r'(?:\[\d+,\d+\])?((?:(?!\(\d+,\d+\)).)+)\((\d+),(\d+)\)')  # 逐字匹配
-    line_split_pattern = re.compile(r'^\[(\d+),(\d+)\](.*)$')  # 逐行匹配
-    tag_split_pattern = re.compile(r"^\[(\w+):([^\]]*)\]$")
-
-    for i in qrc_lines:
-        line = i.strip()
-        line_split_content = re.findall(line_split_pattern, line)
-        if line_split_content:  # 判断是否为歌词行
-            line_start_time, line_duration, line_content = line_split_content[0]
-            lrc_list.append(LyricsLine((int(line_start_time), int(line_start_time) + int(line_duration), [])))
-            wrods_split_content = re.findall(wrods_split_pattern, line)
-            if wrods_split_content:  # 判断是否为逐字歌词
-                for text, starttime, duration in wrods_split_content:
-                    if text != "\r":
-                        lrc_list[-1][2].append(LyricsWord((int(starttime), int(starttime) + int(duration), text)))
-            else:  # 如果不是逐字歌词
-                lrc_list[-1][2].append(LyricsWord((int(line_start_time), int(line_start_time) + int(line_duration), line_content)))
-        else:
-            tag_split_content = re.findall(tag_split_pattern, line)
-            if tag_split_content:
-                tags.update({tag_split_content[0][0]: tag_split_content[0][1]})
-
-    return tags, lrc_list
+    return verbatim2list(m_qrc.group("content").split('\n'), QRC_FORMAT)
 
 
 def qrc_str_parse(lyric: str) -> tuple[dict, LyricsData]:
@@ -59,6 +33,11 @@ def qrc_str_parse(lyric: str) -> tuple[dict, LyricsData]:
     return {}, plaintext2list(lyric)
 
 
+def qrc_parse_encrypted(encrypted_lyric: str) -> LyricsData:
+    """解密并解析加密的歌词(不含标签)"""
+    return qrc_str_parse(qrc_decrypt(encrypted_lyric, QrcType.CLOUD))[1]
+
+
 def get_lyrics(lyrics: Lyrics) -> None:
     if lyrics.title is None or not isinstance(lyrics.artist, list) or lyrics.album is None or not isinstance(lyrics.id, int) or lyrics.duration is None:
         msg = "缺少必要参数"
@@ -74,15 +53,12 @@ def get_lyrics(lyrics: Lyrics) -> None:
         if lrc != "" and lrc_t != "0":
             encrypted_lyric = lrc
 
-            lyric = qrc_decrypt(encrypted_lyric, QrcType.CLOUD)
-
-            if lyric is not None:
-                tags, lyric = qrc_str_parse(lyric)
-
-                if key == "orig":
-                    lyrics.tags = tags
-
-                lyrics[key] = lyric
+            if key == "orig":
+                # 原文歌词的标签即为歌词的标签, 立即解密解析
+                lyrics.tags, lyrics[key] = qrc_str_parse(qrc_decrypt(encrypted_lyric, QrcType.CLOUD))
+            else:
+                # 翻译与罗马音保存加密的歌词, 在首次访问时才解密解析(解密失败时在访问时抛出LyricsDecryptError)
+                lyrics.set_lazy(key, encrypted_lyric, qrc_parse_encrypted)
         elif (lrc_t == "0" and key == "orig"):
             msg = "没有获取到可用的歌词"
             raise LyricsProcessingError(msg)
@@ -1,135 +1,207 @@
 # SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
 # SPDX-License-Identifier: GPL-3.0-only
 import re
+from collections.abc import Iterable
+from operator import itemgetter
+from typing import NamedTuple
 
-from backend.lyrics import LyricsData, LyricsLine, LyricsWord, MultiLyricsData
-from utils.enum import LyricsType, Source
+from backend.lyrics import LyricsData, LyricsLine, LyricsWord, MultiLyricsData, judge_lyrics_type
+from utils.enum import LyricsType, Source, WordTimestampType
 from utils.utils import time2ms
 
 
-def judge_lyrics_type(lyrics: LyricsData) -> LyricsType:
-    lyrics_type = LyricsType.PlainText
-    for line in lyrics:
-        if len(line[2]) > 1:
-            lyrics_type = LyricsType.VERBATIM
-            break
+class VerbatimFormat(NamedTuple):
+    """逐字歌词(QRC/KRC/YRC)格式描述"""
 
-        if line[0] is not None:
-            lyrics_type = LyricsType.LINEBYLINE
+    word_pattern: re.Pattern[str]  # 逐字匹配表达式
+    word_timestamp: WordTimestampType  # 字时间戳的编码方式
+    match_whole_line: bool = False  # 逐字匹配是否作用于整行(否则只作用于行内容)
+    ignored_words: frozenset[str] = frozenset()  # 忽略的字
 
-    return lyrics_type
+
+QRC_FORMAT = VerbatimFormat(re.compile(r'(?:\[\d+,\d+\])?((?:(?!\(\d+,\d+\)).)+)\((\d+),(\d+)\)'),
+                            WordTimestampType.SUFFIX, match_whole_line=True, ignored_words=frozenset({"\r"}))
+KRC_FORMAT = VerbatimFormat(re.compile(r'(?:\[\d+,\d+\])?<(\d+),(\d+),\d+>((?:.(?!\d+,\d+,\d+>))*)'), WordTimestampType.OFFSET_PREFIX)
+YRC_FORMAT = VerbatimFormat(re.compile(r'(?:\[\d+,\d+\])?\((\d+),(\d+),\d+\)((?:.(?!\d+,\d+,\d+\)))*)'), WordTimestampType.PREFIX)
+
+VERBATIM_LINE_PATTERN = re.compile(r'^\[(\d+),(\d+)\](.*)$')  # 逐行匹配
+TAG_PATTERN = re.compile(r"^\[(\w+):([^\]]*)\]$")  # 标签匹配
+
+
+def verbatim2list(lines: Iterable[str], verbatim_format: VerbatimFormat) -> tuple[dict[str, str], LyricsData]:
+    """将逐字歌词(QRC/KRC/YRC)的行转换为列表[(行起始时间, 行结束时间, [(字起始时间, 字结束时间, 字内容)])]
+
+    :param lines: 歌词行
+    :param verbatim_format: 歌词格式
+    :return: (标签, 歌词数据)
+    """
+    tags: dict[str, str] = {}
+    lrc_list = LyricsData([])
+
+    line_match = VERBATIM_LINE_PATTERN.match
+    tag_match = TAG_PATTERN.match
+    words_findall = verbatim_format.word_pattern.findall
+    word_timestamp = verbatim_format.word_timestamp
+    match_whole_line = verbatim_format.match_whole_line
+    ignored_words = verbatim_format.ignored_words
+
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line.startswith("["):
+            continue
+
+        matched = line_match(line)
+        if matched is None:
+            tag_matched = tag_match(line)
+            if tag_matched:  # 标签行
+                tags[tag_matched[1]] = tag_matched[2]
+            continue
+
+        line_start = int(matched[1])
+        line_end = line_start + int(matched[2])
+        line_content = matched[3]
+
+        words_split_content = words_findall(line if match_whole_line else line_content)
+        if not words_split_content:  # 不是逐字歌词
+            lrc_list.append(LyricsLine((line_start, line_end, [LyricsWord((line_start, line_end, line_content))])))
+            continue
+
+        words = []
+        match word_timestamp:
+            case WordTimestampType.SUFFIX:
+                for text, start, duration in words_split_content:
+                    if text not in ignored_words:
+                        word_start = int(start)
+                        words.append(LyricsWord((word_start, word_start + int(duration), text)))
+            case WordTimestampType.OFFSET_PREFIX:
+                for offset, duration, text in words_split_content:
+                    if text not in ignored_words:
+                        word_start = line_start + int(offset)
+                        words.append(LyricsWord((word_start, word_start + int(duration), text)))
+            case WordTimestampType.PREFIX:
+                for start, duration, text in words_split_content:
+                    if text not in ignored_words:
+                        word_start = int(start)
+                        words.append(LyricsWord((word_start, word_start + int(duration), text)))
+        lrc_list.append(LyricsLine((line_start, line_end, words)))
+
+    return tags, lrc_list
+
+
+LRC_LINE_PATTERN = re.compile(r"^\[(\d+):(\d+).(\d+)\](.*)$")  # 歌词行匹配表达式
+LRC_ENHANCED_WORD_PATTERN = re.compile(r"<(\d+):(\d+).(\d+)>([^<]*)(?:<(\d+):(\d+).(\d+)>$)?")  # 增强格式(<mm:ss.xx>字)
+LRC_WORD_PATTERN = re.compile(r"([^\[]*)(?:\[(\d+):(\d+).(\d+)\])?")  # 逐字格式(字[mm:ss.xx])
+LRC_MULTI_LINE_PATTERN = re.compile(r"^((?:\[\d+:\d+\.\d+\]){2,})(.*)$")  # 行首多个时间戳
+LRC_TIMESTAMP_PATTERN = re.compile(r"\[(\d+):(\d+).(\d+)\]")
 
 
 def _lrc2list_list(lrc: str, source: Source | None = None) -> tuple[dict[str, str], list[LyricsData]]:
     lrc_lists: list[LyricsData] = [LyricsData([])]
-    start_time_lists: list[list] = [[]]
+    start_time_sets: list[set[int]] = [set()]  # 每条轨道中已有的行起始时间
 
     def add_line(line: LyricsLine) -> None:
-        for i, lrc_list in enumerate(lrc_lists):
-            if line[0] not in start_time_lists[i]:
+        for lrc_list, start_times in zip(lrc_lists, start_time_sets, strict=True):
+            if line[0] not in start_times:
                 # 没有开始时间相同的歌词行
                 if line[0] is not None:
                     lrc_list.append(line)
-                    start_time_lists[i].append(line[0])
+                    start_times.add(line[0])
                 break
         else:
             if line[2]:
                 lrc_lists.append(LyricsData([line]))
-                start_time_lists.append([line[0]])
+                start_time_sets.append({line[0]})
 
     tags = {}
 
-    tag_split_pattern = re.compile(r"^\[(\w+):([^\]]*)\]$")  # 标签匹配表达式
-    line_split_pattern = re.compile(r"^\[(\d+):(\d+).(\d+)\](.*)$")  # 歌词行匹配表达式
-    enhanced_word_split_pattern = re.compile(r"<(\d+):(\d+).(\d+)>([^<]*)(?:<(\d+):(\d+).(\d+)>$)?")
-    word_split_pattern = re.compile(r"([^\[]*)(?:\[(\d+):(\d+).(\d+)\])?")
-
-    multi_line_split_pattern = re.compile(r"^((?:\[\d+:\d+\.\d+\]){2,})(.*)$")
-    timestamps_pattern = re.compile(r"\[(\d+):(\d+).(\d+)\]")
+    line_match = LRC_LINE_PATTERN.match
+    tag_match = TAG_PATTERN.match
+    enhanced_words_findall = LRC_ENHANCED_WORD_PATTERN.findall
+    words_findall = LRC_WORD_PATTERN.findall
+    multi_line_match = LRC_MULTI_LINE_PATTERN.match if source == Source.NE else None
 
     for line_str in lrc.splitlines():
         line_data = line_str.strip()
         if not line_data or not line_data.startswith("["):
             continue
 
-        line_split_content: list[str] = line_split_pattern.findall(line_str)
-        if line_split_content:  # 歌词行
-            m, s, ms, line_content = line_split_content[0]
-            start, end, words = time2ms(m, s, ms), None, []
-
-            if source == Source.NE:
-                # 如果转换的是网易云歌词且这一行有开头有几个连在一起的时间戳表示这几个时间戳的行都是这个歌词
-                multi_line_split_content = multi_line_split_pattern.findall(line_str)
-                if multi_line_split_content:
-                    # 歌词行开头有多个时间戳
-                    timestamps, line_content = multi_line_split_content[0]
-                    for m, s, ms in timestamps_pattern.findall(timestamps):
-                        start = time2ms(m, s, ms)
-                        add_line(LyricsLine((start, None, [LyricsWord((start, None, line_content))])))
-                    continue
-
-            if "<" in line_content and ">" in line_content:
-                # 歌词行为增强格式
-                enhanced_word_split_content: list[str] | None = enhanced_word_split_pattern.findall(line_content)
-                if enhanced_word_split_content:
-                    for s_m, s_s, s_ms, word_str, e_m, e_s, e_ms in enhanced_word_split_content:
-                        word_start, word_end = time2ms(s_m, s_s, s_ms), None
-                        if e_m and e_s and e_ms:
-                            # 结束时间存在(即行末)
-                            word_end = time2ms(e_m, e_s, e_ms)
-                            end = word_end
-
-                        # 添加上一字的结束时间
-                        if words:  # 上一字存在
-                            words[-1][1] = word_start
+        line_matched = line_match(line_str)
+        if line_matched is None:
+            tag_matched = tag_match(line_str)
+            if tag_matched:  # 标签行
+                tags[tag_matched[1]] = tag_matched[2]
+            continue
 
-                        # 添加歌词字到歌词行
-                        if word_str:
-                            words.append(LyricsWord((word_start, word_end, word_str)))
+        # 歌词行
+        m, s, ms, line_content = line_matched.groups()
+        start, end, words = time2ms(m, s, ms), None, []
+
+        if multi_line_match is not None and line_content.startswith("["):
+            # 如果转换的是网易云歌词且这一行有开头有几个连在一起的时间戳表示这几个时间戳的行都是这个歌词
+            multi_line_matched = multi_line_match(line_str)
+            if multi_line_matched:
+                # 歌词行开头有多个时间戳
+                timestamps, line_content = multi_line_matched.groups()
+                for m, s, ms in LRC_TIMESTAMP_PATTERN.findall(timestamps):
+                    start = time2ms(m, s, ms)
+                    add_line(LyricsLine((start, None, [LyricsWord((start, None, line_content))])))
+                continue
+
+        enhanced_word_split_content = None
+        if "<" in line_content and ">" in line_content:
+            # 歌词行为增强格式
+            enhanced_word_split_content = enhanced_words_findall(line_content)
+            for s_m, s_s, s_ms, word_str, e_m, e_s, e_ms in enhanced_word_split_content:
+                word_start, word_end = time2ms(s_m, s_s, s_ms), None
+                if e_m and e_s and e_ms:
+                    # 结束时间存在(即行末)
+                    word_end = time2ms(e_m, e_s, e_ms)
+                    end = word_end
+
+                # 添加上一字的结束时间
+                if words:  # 上一字存在
+                    words[-1][1] = word_start
+
+                # 添加歌词字到歌词行
+                if word_str:
+                    words.append(LyricsWord((word_start, word_end, word_str)))
+
+        if not enhanced_word_split_content:
+            # 歌词行不为增强格式
+            if "[" not in line_content:
+                # 没有字时间戳, 整行为一个字
+                if line_content:
+                    words.append(LyricsWord((start, None, line_content)))
             else:
-                enhanced_word_split_content = None
-
-            if not enhanced_word_split_content:
-                # 歌词行不为增强格式
-                word_split_content: list[str] = word_split_pattern.findall(line_content)
-                if word_split_content:
-                    # 逐字
-
-                    for w_i, (word_str, e_m, e_s, e_ms) in enumerate(word_split_content):
-                        word_start, word_end = None, None
-                        if e_m and e_s and e_ms:
-                            # 结束时间存在
-                            word_end = time2ms(e_m, e_s, e_ms)
-                            if w_i == len(word_split_content) - 1:
-                                # 当前歌词为最后一行歌词
-                                end = word_end
-
-                        # 添加开始时间
-                        word_start = start if not words else words[-1][1]
-
-                        # 添加歌词字到歌词行
-                        if word_str:
-                            words.append(LyricsWord((word_start, word_end, word_str)))
-                elif line_content.strip():
-                    words = [LyricsWord((start, None, line_content))]  # 开始时间, 结束时间, 歌词
-
-            add_line(LyricsLine((start, end, words)))
-            continue
+                # 逐字
+                word_split_content: list[tuple[str, str, str, str]] = words_findall(line_content)
+                last_index = len(word_split_content) - 1
+                for w_i, (word_str, e_m, e_s, e_ms) in enumerate(word_split_content):
+                    word_end = None
+                    if e_m and e_s and e_ms:
+                        # 结束时间存在
+                        word_end = time2ms(e_m, e_s, e_ms)
+                        if w_i == last_index:
+                            # 当前歌词为最后一行歌词
+                            end = word_end
+
+                    # 添加歌词字到歌词行
+                    if word_str:
+                        # 开始时间为上一字的结束时间
+                        words.append(LyricsWord((start if not words else words[-1][1], word_end, word_str)))
 
-        tag_split_content = tag_split_pattern.findall(line_str)
-        if tag_split_content:  # 标签行
-            tags.update({tag_split_content[0][0]: tag_split_content[0][1]})
+        add_line(LyricsLine((start, end, words)))
 
     # 按起始时间排序
     for i, lrc_list in enumerate(lrc_lists):
-        lrc_lists[i] = LyricsData(sorted((line for line in lrc_list if line[0] is not None), key=lambda x: x[0]))  # type: ignore[]
-        for i_, line in enumerate(lrc_lists[i]):
-            if i_ != 0 and lrc_lists[i][i_ - 1][1] is None and line[0] is not None:
+        lrc_list = sorted((line for line in lrc_list if line[0] is not None), key=itemgetter(0))  # noqa: PLW2901
+        for i_ in range(1, len(lrc_list)):
+            if lrc_list[i_ - 1][1] is None and lrc_list[i_][0] is not None:
                 # 上一行歌词结束时间不存在, 当前行歌词开始时间存在, 则上一行歌词结束时间等于当前行歌词开始时间
-                lrc_lists[i][i_ - 1] = LyricsLine((lrc_lists[i][i_ - 1][0], line[0], lrc_lists[i][i_ - 1][2]))
+                lrc_list[i_ - 1] = LyricsLine((lrc_list[i_ - 1][0], lrc_list[i_][0], lrc_list[i_ - 1][2]))
 
         # 清除空行
-        lrc_lists[i] = LyricsData([line for line in lrc_lists[i] if line[2]])
+        lrc_lists[i] = LyricsData([line for line in lrc_list if line[2]])
 
     return tags, lrc_lists
 
@@ -152,19 +224,32 @@ def lrc2dict(lrc: str, source: Source | None = None) -> tuple[dict[str, str], Mu
     return tags, MultiLyricsData({"roma": lrc_lists[0], "orig": lrc_lists[1], "ts": lrc_lists[2]})
 
 
+def merge_lrc_lists(lrc_lists: list[LyricsData]) -> LyricsData:
+    """将多条轨道合并为一个LyricsData
+
+    其他轨道中的歌词行插入到第一条轨道中起始时间相同的歌词行之后(按轨道顺序), 没有对应行的歌词行将被丢弃
+    :param lrc_lists: 各轨道的歌词数据(第一条轨道中每个起始时间只出现一次)
+    :return: 合并后的歌词数据
+    """
+    if len(lrc_lists) <= 1:
+        return lrc_lists[0] if lrc_lists else LyricsData([])
+
+    # 起始时间 -> 该时间的歌词行(第一条轨道的行在最前)
+    groups: dict[int | None, list[LyricsLine]] = {line[0]: [line] for line in lrc_lists[0]}
+    for lrc_list in lrc_lists[1:]:
+        for line in lrc_list:
+            group = groups.get(line[0])
+            if group is not None:
+                # 歌词行起始时间相同,向后插入(插入到与最后一行相等的第一行之后)
+                group.insert(group.index(group[-1]) + 1, line)
+
+    return LyricsData([line for first_line in lrc_lists[0] for line in groups[first_line[0]]])
+
+
 def lrc2list(lrc: str, source: Source | None = None) -> tuple[dict[str, str], LyricsData]:
     tags, lrc_lists = _lrc2list_list(lrc, source)
     # 合并为一个LyricsData
-    for i, lrc_list in enumerate(lrc_lists):
-        if i == 0:
-            continue
-        for line_list1 in lrc_list:
-            for line_list2 in reversed(lrc_lists[0]):
-                if line_list1[0] == line_list2[0]:
-                    # 歌词行起始时间相同,向后插入
-                    lrc_lists[0].insert(lrc_lists[0].index(line_list2) + 1, line_list1)
-                    break
-    return tags, lrc_lists[0]
+    return tags, merge_lrc_lists(lrc_lists)
 
 
 def plaintext2list(plaintext: str) -> LyricsData:
@@ -0,0 +1,48 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""位并行(Myers/Hyyrö)编辑距离
+
+较短的字符串作为模式串, 每个字符的出现位置保存为整数位掩码, 对较长字符串的每个字符只做常数次位运算
+(Python整数没有位数限制, 模式串较长时也不需要分块)
+"""
+
+
+def levenshtein_distance(text1: str, text2: str) -> int:
+    """计算两个字符串的编辑距离(插入、删除、替换的代价都为1)"""
+    if len(text1) > len(text2):
+        text1, text2 = text2, text1
+    length = len(text1)
+    if length == 0:
+        return len(text2)
+
+    peq: dict[str, int] = {}  # 字符在模式串中出现位置的位掩码
+    for i, char in enumerate(text1):
+        peq[char] = peq.get(char, 0) | (1 << i)
+
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    pv, mv = full, 0  # 纵向差值为+1/-1的位置
+    distance = length
+    for char in text2:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            distance += 1
+        elif mh & last:
+            distance -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv & full
+    return distance
+
+
+def levenshtein_ratio(text1: str, text2: str) -> float:
+    """基于编辑距离的相似度(0~1), 1 - 编辑距离 / 较长字符串的长度"""
+    longest = max(len(text1), len(text2))
+    if longest == 0:
+        return 1.0
+    return 1 - levenshtein_distance(text1, text2) / longest
@@ -1,6 +1,17 @@
 # SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
 # SPDX-License-Identifier: GPL-3.0-only
-from typing import TYPE_CHECKING, NewType
+import sys
+from array import array
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from itertools import accumulate
+from typing import TYPE_CHECKING, Any, NewType, overload
+
+from utils.enum import LyricsType
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 if TYPE_CHECKING:
     from utils.enum import Source
@@ -10,19 +21,221 @@ LyricsLine = NewType("LyricsLine", tuple[int | None, int | None, list[LyricsWord
 LyricsData = NewType("LyricsData", list[LyricsLine])
 MultiLyricsData = NewType("MultiLyricsData", dict[str, LyricsData])
 
+_LAZY = object()  # 延迟解析的歌词在字典中的占位
 
-def get_full_timestamps_lyrics_data(data: LyricsData, duration: int | None, only_line: bool = False, skip_none: bool = False) -> LyricsData:
-    """获取完整时间戳的歌词数据
 
-    :param data: 歌词数据
-    :param end_time: 歌曲结束时间
-    :param only_line: 是否只推算行时间戳
-    :param skip_none: 是否跳过无法推算时间戳的行
+def judge_lyrics_type(lyrics: LyricsData) -> LyricsType:
+    lyrics_type = LyricsType.PlainText
+    for line in lyrics:
+        if len(line[2]) > 1:
+            lyrics_type = LyricsType.VERBATIM
+            break
+
+        if line[0] is not None:
+            lyrics_type = LyricsType.LINEBYLINE
+
+    return lyrics_type
+
+
+NONE_TIME = -(2 ** 31)  # ColumnarLyricsData中表示时间戳为None的值
+
+
+def _flatten_lyrics_data(data: LyricsData) -> tuple[array, array, array, array, array, list[str]]:
+    """将LyricsData展开为(行起始时间, 行结束时间, 每行的字偏移量, 字起始时间, 字结束时间, 字内容), None保存为NONE_TIME"""
+    words = [word for line in data for word in line[2]]
+    return (array("i", [NONE_TIME if line[0] is None else line[0] for line in data]),
+            array("i", [NONE_TIME if line[1] is None else line[1] for line in data]),
+            array("i", accumulate([len(line[2]) for line in data], initial=0)),
+            array("i", [NONE_TIME if word[0] is None else word[0] for word in words]),
+            array("i", [NONE_TIME if word[1] is None else word[1] for word in words]),
+            [word[2] for word in words])
+
+
+class ColumnarLyricsData(Sequence[LyricsLine]):
+    """按列存储的歌词数据, 读取接口与LyricsData相同(索引/迭代得到(行起始时间, 行结束时间, [(字起始时间, 字结束时间, 字内容)]))
+
+    时间戳保存在int32数组中(None保存为NONE_TIME), 所有字的内容拼接为一个字符串, 按偏移量切片读取
     """
+
+    __slots__ = ("line_ends", "line_starts", "line_word_offsets", "text", "text_offsets", "word_ends", "word_starts")
+
+    def __init__(self, line_starts: array, line_ends: array, line_word_offsets: array,
+                 word_starts: array, word_ends: array, text_offsets: array, text: str) -> None:
+        """从各列数据创建(通常使用from_lyrics_data)
+
+        :param line_starts: 行起始时间
+        :param line_ends: 行结束时间
+        :param line_word_offsets: 第i行的字为word_*[line_word_offsets[i]:line_word_offsets[i + 1]]
+        :param word_starts: 字起始时间
+        :param word_ends: 字结束时间
+        :param text_offsets: 第j个字的内容为text[text_offsets[j]:text_offsets[j + 1]]
+        :param text: 所有字的内容
+        """
+        self.line_starts = line_starts
+        self.line_ends = line_ends
+        self.line_word_offsets = line_word_offsets
+        self.word_starts = word_starts
+        self.word_ends = word_ends
+        self.text_offsets = text_offsets
+        self.text = text
+
+    @classmethod
+    def from_lyrics_data(cls, data: LyricsData) -> "ColumnarLyricsData":
+        """从LyricsData转换(时间戳需在int32范围内)"""
+        line_starts, line_ends, line_word_offsets, word_starts, word_ends, texts = _flatten_lyrics_data(data)
+        return cls(line_starts, line_ends, line_word_offsets, word_starts, word_ends, array("i", accumulate(map(len, texts), initial=0)), "".join(texts))
+
+    def to_lyrics_data(self) -> LyricsData:
+        """转换为LyricsData"""
+        return LyricsData(list(self))
+
+    def _words(self, index: int) -> list[LyricsWord]:
+        word_starts, word_ends, text_offsets, text = self.word_starts, self.word_ends, self.text_offsets, self.text
+        return [LyricsWord((None if word_starts[j] == NONE_TIME else word_starts[j],
+                            None if word_ends[j] == NONE_TIME else word_ends[j],
+                            text[text_offsets[j]:text_offsets[j + 1]]))
+                for j in range(self.line_word_offsets[index], self.line_word_offsets[index + 1])]
+
+    def __len__(self) -> int:
+        return len(self.line_starts)
+
+    @overload
+    def __getitem__(self, index: int) -> LyricsLine: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> LyricsData: ...
+
+    def __getitem__(self, index: int | slice) -> LyricsLine | LyricsData:
+        if isinstance(index, slice):
+            return LyricsData([self[i] for i in range(*index.indices(len(self)))])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            msg = "ColumnarLyricsData index out of range"
+            raise IndexError(msg)
+        line_start, line_end = self.line_starts[index], self.line_ends[index]
+        return LyricsLine((None if line_start == NONE_TIME else line_start,
+                           None if line_end == NONE_TIME else line_end,
+                           self._words(index)))
+
+    def __iter__(self) -> Iterator[LyricsLine]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def nbytes(self) -> int:
+        """占用的内存(字节)"""
+        return sum(column.buffer_info()[1] * column.itemsize
+                   for column in (self.line_starts, self.line_ends, self.line_word_offsets, self.word_starts, self.word_ends, self.text_offsets)
+                   ) + sys.getsizeof(self.text)
+
+
+class OffsetLyricsData(Sequence[LyricsLine]):
+    """添加偏移量后的歌词数据视图, 读取时才计算时间戳(不为None的时间戳t变为max(t + offset, floor))
+
+    包装另一个OffsetLyricsData时会合并两者的偏移量, 不会产生中间副本
+    """
+
+    __slots__ = ("data", "floor", "offset")
+
+    def __init__(self, data: Sequence[LyricsLine], offset: int, floor: int = 0) -> None:
+        """创建偏移视图(对OffsetLyricsData再次偏移时合并偏移量)
+
+        :param data: 歌词数据(LyricsData或ColumnarLyricsData)
+        :param offset: 偏移量
+        :param floor: 时间戳的下限
+        """
+        if isinstance(data, OffsetLyricsData):
+            # max(max(t + o1, f1) + o2, f2) = max(t + o1 + o2, max(f1 + o2, f2))
+            offset, floor = data.offset + offset, max(data.floor + offset, floor)
+            data = data.data
+        self.data = data
+        self.offset = offset
+        self.floor = floor
+
+    def shift(self, time: int | None) -> int | None:
+        if time is None:
+            return None
+        return max(time + self.offset, self.floor)
+
+    def _shift_line(self, line: LyricsLine) -> LyricsLine:
+        shift = self.shift
+        return LyricsLine((shift(line[0]), shift(line[1]), [LyricsWord((shift(word[0]), shift(word[1]), word[2])) for word in line[2]]))
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @overload
+    def __getitem__(self, index: int) -> LyricsLine: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> LyricsData: ...
+
+    def __getitem__(self, index: int | slice) -> LyricsLine | LyricsData:
+        if isinstance(index, slice):
+            return LyricsData([self._shift_line(line) for line in self.data[index]])
+        return self._shift_line(self.data[index])
+
+    def __iter__(self) -> Iterator[LyricsLine]:
+        return map(self._shift_line, self.data)
+
+    def to_lyrics_data(self) -> LyricsData:
+        return LyricsData(list(self))
+
+    def to_columnar(self) -> ColumnarLyricsData:
+        """批量计算偏移后的时间戳(每列一次遍历), 字的内容与偏移量数组与原数据共用"""
+        data = self.data if isinstance(self.data, ColumnarLyricsData) else ColumnarLyricsData.from_lyrics_data(LyricsData(list(self.data)))
+        offset, floor = self.offset, self.floor
+
+        def shift_column(column: array) -> array:
+            return array("i", [time if time == NONE_TIME else max(time + offset, floor) for time in column])
+
+        return ColumnarLyricsData(shift_column(data.line_starts), shift_column(data.line_ends), data.line_word_offsets,
+                                  shift_column(data.word_starts), shift_column(data.word_ends), data.text_offsets, data.text)
+
+
+class OffsetMultiLyricsData(Mapping[str, OffsetLyricsData]):
+    """添加偏移量后的多语言歌词视图, 读取某一语言时返回OffsetLyricsData"""
+
+    __slots__ = ("data", "floor", "offset")
+
+    def __init__(self, data: Mapping[str, Sequence[LyricsLine]], offset: int, floor: int = 0) -> None:
+        """创建多语言偏移视图(对OffsetMultiLyricsData再次偏移时合并偏移量)
+
+        :param data: 多语言歌词数据(MultiLyricsData或Lyrics)
+        :param offset: 偏移量
+        :param floor: 时间戳的下限
+        """
+        if isinstance(data, OffsetMultiLyricsData):
+            offset, floor = data.offset + offset, max(data.floor + offset, floor)
+            data = data.data
+        self.data = data
+        self.offset = offset
+        self.floor = floor
+
+    def __getitem__(self, lang: str) -> OffsetLyricsData:
+        return OffsetLyricsData(self.data[lang], self.offset, self.floor)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def add_offset(self, offset: int) -> "OffsetMultiLyricsData":
+        """在当前偏移量的基础上再添加偏移量"""
+        return OffsetMultiLyricsData(self, offset)
+
+    def materialize(self) -> MultiLyricsData:
+        """转换为MultiLyricsData"""
+        return MultiLyricsData({lang: self[lang].to_lyrics_data() for lang in self})
+
+
+def _full_timestamps_python(data: LyricsData, duration: int | None, only_line: bool, skip_none: bool) -> LyricsData:
     result = LyricsData([])
-    for i, line in enumerate(data):
-        line_start_time = line[2][0][0] if line[0] is None and line[2] and line[2][0][0] is not None else line[0]
-        line_end_time = line[2][-1][1] if line[1] is None and line[2] and line[2][-1][1] is not None else line[1]
+    last_index = len(data) - 1
+    for i, (line_start, line_end, line_words) in enumerate(data):
+        line_start_time = line_words[0][0] if line_start is None and line_words and line_words[0][0] is not None else line_start
+        line_end_time = line_words[-1][1] if line_end is None and line_words and line_words[-1][1] is not None else line_end
         if line_start_time is None:
             if i == 0:
                 line_start_time = 0
@@ -32,7 +245,7 @@ def get_full_timestamps_lyrics_data(data: LyricsData, duration: int | None, only
                 continue
 
         if line_end_time is None:
-            if i == len(data) - 1:
+            if i == last_index:
                 line_end_time = duration
             elif data[i + 1][0] is not None:
                 line_end_time = data[i + 1][0]
@@ -40,26 +253,26 @@ def get_full_timestamps_lyrics_data(data: LyricsData, duration: int | None, only
                 continue
 
         if only_line:
-            result.append(LyricsLine((line_start_time, line_end_time, line[2])))
+            result.append(LyricsLine((line_start_time, line_end_time, line_words)))
             continue
 
         words = []
-        for j, word in enumerate(line[2]):
-            word_start_time = word[0]
-            word_end_time = word[1]
+        last_word_index = len(line_words) - 1
+        for j, word in enumerate(line_words):
+            word_start_time, word_end_time = word[0], word[1]
             if word_start_time is None:
                 if j == 0 and line_start_time:
                     word_start_time = line_start_time
-                elif j != 0 and line[2][j - 1][1] is not None:
-                    word_start_time = line[2][j - 1][1]
+                elif j != 0 and line_words[j - 1][1] is not None:
+                    word_start_time = line_words[j - 1][1]
                 elif skip_none:
                     continue
 
             if word_end_time is None:
-                if j == len(line[2]) - 1 and line_end_time:
+                if j == last_word_index and line_end_time:
                     word_end_time = line_end_time
-                elif j != len(line[2]) - 1 and line[2][j + 1][0] is not None:
-                    word_end_time = line[2][j + 1][0]
+                elif j != last_word_index and line_words[j + 1][0] is not None:
+                    word_end_time = line_words[j + 1][0]
                 elif skip_none:
                     continue
 
@@ -69,7 +282,108 @@ def get_full_timestamps_lyrics_data(data: LyricsData, duration: int | None, only
     return result
 
 
+def _full_timestamps_numpy(data: ColumnarLyricsData, duration: int | None, only_line: bool, skip_none: bool) -> ColumnarLyricsData:
+    """与_full_timestamps_python结果相同, 在扁平的时间戳数组上整体计算(None为NONE_TIME)"""
+    def column(values: array) -> "np.ndarray":
+        return np.frombuffer(values, dtype=np.int32).astype(np.int64) if len(values) else np.zeros(0, dtype=np.int64)
+
+    def to_array(values: "np.ndarray") -> array:
+        return array("i", values.astype(np.int32).tobytes())
+
+    none = np.int64(NONE_TIME)
+    line_count, word_count = len(data.line_starts), len(data.word_starts)
+    line_starts, line_ends, offsets = column(data.line_starts), column(data.line_ends), column(data.line_word_offsets)
+    # 末尾补一个NONE_TIME, 空行的首字/末字指向它
+    word_starts, word_ends = np.append(column(data.word_starts), none), np.append(column(data.word_ends), none)
+
+    # 行时间戳: 自身 -> 首字起始/末字结束时间 -> 上一行结束/下一行起始时间(原始值) -> 0/歌曲时长
+    first_word, last_word = offsets[:-1], offsets[1:] - 1
+    has_words = offsets[1:] > offsets[:-1]
+    starts = np.where(line_starts == none, word_starts[np.where(has_words, first_word, word_count)], line_starts)
+    ends = np.where(line_ends == none, word_ends[np.where(has_words, last_word, word_count)], line_ends)
+    starts_missing, ends_missing = starts == none, ends == none
+    starts = np.where(starts_missing, np.concatenate(([none], line_ends[:-1])), starts)
+    ends = np.where(ends_missing, np.concatenate((line_starts[1:], [none])), ends)
+    if starts_missing[0]:
+        starts[0] = 0
+    if ends_missing[-1]:
+        # 最后一行的结束时间为歌曲时长(即使为None也不跳过)
+        ends[-1] = NONE_TIME if duration is None else duration
+        keep_line = (starts != none) & ((ends != none) | (np.arange(line_count) == line_count - 1))
+    else:
+        keep_line = (starts != none) & (ends != none)
+
+    word_line = np.repeat(np.arange(line_count), np.diff(offsets))
+    if only_line:
+        new_starts, new_ends = word_starts[:-1], word_ends[:-1]
+        keep_word = keep_line[word_line]
+    else:
+        # 字时间戳: 自身 -> (首字)行起始时间/上一字结束时间 -> (末字)行结束时间/下一字起始时间, 行时间戳为0时不使用
+        word_index = np.arange(word_count)
+        word_line_starts, word_line_ends = starts[word_line], ends[word_line]
+        raw_starts, raw_ends = word_starts[:-1], word_ends[:-1]
+        new_starts = np.where(raw_starts == none,
+                              np.where(word_index == first_word[word_line],
+                                       np.where((word_line_starts != none) & (word_line_starts != 0), word_line_starts, none),
+                                       np.concatenate(([none], raw_ends[:-1]))),
+                              raw_starts)
+        new_ends = np.where(raw_ends == none,
+                            np.where(word_index == last_word[word_line],
+                                     np.where((word_line_ends != none) & (word_line_ends != 0), word_line_ends, none),
+                                     np.concatenate((raw_starts[1:], [none]))),
+                            raw_ends)
+        keep_word = keep_line[word_line] & (new_starts != none) & (new_ends != none)
+
+    if not skip_none or (keep_line.all() and keep_word.all()):
+        return ColumnarLyricsData(to_array(starts), to_array(ends), data.line_word_offsets,
+                                  to_array(new_starts), to_array(new_ends), data.text_offsets, data.text)
+
+    # 去除无法推算时间戳的行与字
+    kept_word_counts = np.bincount(word_line[keep_word], minlength=line_count)[keep_line]
+    text_offsets = data.text_offsets
+    kept_words = np.flatnonzero(keep_word).tolist()
+    text = "".join([data.text[text_offsets[j]:text_offsets[j + 1]] for j in kept_words])
+    text_lengths = np.diff(column(text_offsets))[keep_word]
+    return ColumnarLyricsData(to_array(starts[keep_line]), to_array(ends[keep_line]),
+                              to_array(np.concatenate(([0], np.cumsum(kept_word_counts)))),
+                              to_array(new_starts[keep_word]), to_array(new_ends[keep_word]),
+                              to_array(np.concatenate(([0], np.cumsum(text_lengths)))), text)
+
+
+@overload
+def get_full_timestamps_lyrics_data(data: LyricsData, duration: int | None, only_line: bool = False, skip_none: bool = False) -> LyricsData: ...
+
+
+@overload
+def get_full_timestamps_lyrics_data(data: ColumnarLyricsData, duration: int | None, only_line: bool = False,
+                                    skip_none: bool = False) -> ColumnarLyricsData: ...
+
+
+def get_full_timestamps_lyrics_data(data: LyricsData | ColumnarLyricsData, duration: int | None,
+                                    only_line: bool = False, skip_none: bool = False) -> LyricsData | ColumnarLyricsData:
+    """获取完整时间戳的歌词数据
+
+    ColumnarLyricsData在扁平的时间戳数组上整体计算(需要NumPy, 否则转换后逐行计算), 结果同样为ColumnarLyricsData
+    :param data: 歌词数据
+    :param duration: 歌曲结束时间
+    :param only_line: 是否只推算行时间戳
+    :param skip_none: 是否跳过无法推算时间戳的行
+    """
+    if isinstance(data, ColumnarLyricsData):
+        if not data:
+            return data
+        if np is not None:
+            return _full_timestamps_numpy(data, duration, only_line, skip_none)
+        return ColumnarLyricsData.from_lyrics_data(_full_timestamps_python(data.to_lyrics_data(), duration, only_line, skip_none))
+    return _full_timestamps_python(data, duration, only_line, skip_none)
+
+
 class Lyrics(dict):
+    """歌词 {歌词类型(orig/ts/roma...): LyricsData}
+
+    通过set_lazy添加的歌词只保存原始数据, 在首次通过字典接口访问时才解析(解密或解析的错误也在此时抛出)
+    """
+
     INFO_KEYS = ("source", "title", "artist", "album", "id", "mid", "duration", "accesskey")
 
     def __init__(self, info: dict | None = None) -> None:
@@ -84,8 +398,136 @@ class Lyrics(dict):
         self.duration: int | None = info.get("duration", None)
         self.accesskey: str | None = info.get("accesskey", None)
 
-        self.types = {}
         self.tags = {}
+        self._lazy: dict[str, tuple[Any, Callable[[Any], LyricsData]]] = {}
+        self._types: dict[str, tuple[LyricsData, int, LyricsType]] = {}
+        # (歌曲时长, skip_none): (各歌词的(类型, id, 行数), 完整时间戳的歌词)
+        self._full_timestamps_cache: dict[tuple[int | None, bool], tuple[tuple[tuple[str, int, int], ...], dict[str, LyricsData]]] = {}
+
+    def set_lazy(self, lang: str, payload: Any, parser: Callable[[Any], LyricsData]) -> None:
+        """添加延迟解析的歌词
+
+        :param lang: 歌词类型
+        :param payload: 原始数据(加密或明文歌词)
+        :param parser: 将原始数据解析为歌词数据的函数, 在首次访问该歌词时调用
+        """
+        self._discard(lang)
+        self._lazy[lang] = (payload, parser)
+        dict.__setitem__(self, lang, _LAZY)
+
+    def _discard(self, lang: str) -> None:
+        """丢弃歌词相关的延迟解析数据与缓存"""
+        self._lazy.pop(lang, None)
+        self._types.pop(lang, None)
+        self._full_timestamps_cache = {}
+
+    def __getitem__(self, lang: str) -> LyricsData:
+        lyrics_data = dict.__getitem__(self, lang)
+        if lyrics_data is _LAZY:
+            # 解析成功后才移除原始数据, 解析失败时再次访问会重新解析
+            payload, parser = self._lazy[lang]
+            lyrics_data = parser(payload)
+            dict.__setitem__(self, lang, lyrics_data)
+            del self._lazy[lang]
+        return lyrics_data
+
+    def __setitem__(self, lang: str, lyrics_data: LyricsData) -> None:
+        self._discard(lang)
+        dict.__setitem__(self, lang, lyrics_data)
+
+    def __delitem__(self, lang: str) -> None:
+        dict.__delitem__(self, lang)
+        self._discard(lang)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for lang, lyrics_data in dict(*args, **kwargs).items():
+            self[lang] = lyrics_data
+
+    def __iter__(self) -> Iterator[str]:
+        # 重写__iter__使dict(lyrics)等复制操作通过__getitem__获取歌词
+        return dict.__iter__(self)
+
+    # 以下方法均通过__getitem__获取歌词, 避免返回或比较未解析的歌词
+    def get(self, lang: str, default: Any = None) -> Any:
+        if lang not in self:
+            return default
+        return self[lang]
+
+    def pop(self, lang: str, *default: Any) -> Any:
+        if lang not in self:
+            if default:
+                return default[0]
+            raise KeyError(lang)
+        lyrics_data = self[lang]
+        del self[lang]
+        return lyrics_data
+
+    def popitem(self) -> tuple[str, LyricsData]:
+        if not self:
+            msg = "popitem(): dictionary is empty"
+            raise KeyError(msg)
+        lang = next(reversed(self))
+        return lang, self.pop(lang)
+
+    def setdefault(self, lang: str, default: LyricsData | None = None) -> LyricsData | None:
+        if lang not in self:
+            self[lang] = default
+        return self[lang]
+
+    def copy(self) -> dict[str, LyricsData]:
+        return dict(self.items())
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, dict):
+            return NotImplemented
+        return dict(self.items()) == (dict(other.items()) if isinstance(other, Lyrics) else other)
+
+    def __ne__(self, other: object) -> bool:
+        if not isinstance(other, dict):
+            return NotImplemented
+        return not self == other
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __or__(self, other: object) -> dict[str, LyricsData]:
+        if not isinstance(other, dict):
+            return NotImplemented
+        result = self.copy()
+        result.update(other)
+        return result
+
+    def __ior__(self, other: object) -> "Lyrics":  # noqa: PYI034  # 需支持Python 3.10(没有typing.Self)
+        self.update(other)
+        return self
+
+    def __repr__(self) -> str:
+        # 不解析延迟解析的歌词(repr不应抛出解密/解析错误)
+        return "{" + ", ".join(f"{lang!r}: {'<lazy>' if lyrics_data is _LAZY else repr(lyrics_data)}"
+                               for lang, lyrics_data in dict.items(self)) + "}"
+
+    def __reduce__(self) -> tuple:
+        # 序列化(如多进程传递)时解析所有歌词, 重建时先调用__init__再添加歌词
+        items = self.items()
+        state = {**self.__dict__, "_types": {}, "_full_timestamps_cache": {}}
+        return self.__class__, (), state, None, iter(items)
+
+    def values(self) -> list[LyricsData]:  # type: ignore[override]
+        return [self[lang] for lang in self]
+
+    def items(self) -> list[tuple[str, LyricsData]]:  # type: ignore[override]
+        return [(lang, self[lang]) for lang in self]
+
+    @property
+    def types(self) -> dict[str, LyricsType]:
+        """各歌词的类型(会解析所有延迟解析的歌词, 已判断的歌词在修改前复用结果)"""
+        types = {}
+        for lang, lyrics_data in self.items():
+            cached = self._types.get(lang)
+            if cached is None or cached[0] is not lyrics_data or cached[1] != len(lyrics_data):
+                cached = (lyrics_data, len(lyrics_data), judge_lyrics_type(lyrics_data))
+                self._types[lang] = cached
+            types[lang] = cached[2]
+        return types
 
     def get_info(self) -> dict:
         info = {}
@@ -122,7 +564,7 @@ class Lyrics(dict):
             if last_line[0] is not None:
                 return last_line[0]
         elif self:
-            last_line = next(iter(self.values()))[-1]
+            last_line = self[next(iter(self))][-1]
             if last_line[1] is not None:
                 return last_line[1]
             if last_line[2]:
@@ -135,33 +577,13 @@ class Lyrics(dict):
         msg = "can not get duration"
         raise ValueError(msg)
 
-    def add_offset(self, offset: int = 0) -> MultiLyricsData:
+    def add_offset(self, offset: int = 0) -> OffsetMultiLyricsData:
         """添加偏移量
 
         :param offset:偏移量
-        :return: 偏移后的歌词数据
+        :return: 偏移后的歌词数据(视图, 读取时才计算时间戳, 可用materialize转换为MultiLyricsData)
         """
-        multi_lyrics_data = MultiLyricsData(self)
-
-        if offset == 0:
-            return multi_lyrics_data
-
-        def _offset_time(time: int | None) -> int | None:
-            if isinstance(time, int):
-                return max(time + offset, 0)
-            return time
-
-        return MultiLyricsData({
-            lang: LyricsData([
-                LyricsLine((
-                    _offset_time(lrc_line[0]),
-                    _offset_time(lrc_line[1]),
-                    [LyricsWord((_offset_time(word[0]), _offset_time(word[1]), word[2])) for word in lrc_line[2]],
-                ))
-                for lrc_line in lrc_list
-            ])
-            for lang, lrc_list in multi_lyrics_data.items()
-        })
+        return OffsetMultiLyricsData(self, offset)
 
     def set_data(self, data: MultiLyricsData) -> None:
         for lang, lyrics_data in data.items():
@@ -170,10 +592,26 @@ class Lyrics(dict):
     def get_full_timestamps_lyrics(self, duration_ms: int | None = None, skip_none: bool = False) -> "Lyrics":
         """获取完整时间戳的歌词
 
+        各语言的结果按(歌曲时长, skip_none)缓存在歌词对象上, 赋值/删除歌词或原地增删行时重新计算,
+        只原地修改行内容(行数不变)时需重新赋值该歌词. 每次返回新的Lyrics对象(类型与原歌词相同),
+        其中的歌词数据与缓存共用, 不应原地修改
         :param duration_ms: 歌曲时长
         :param skip_none: 是否跳过没有时间戳的歌词
         :return: 完整时间戳的歌词
         """
+        duration = duration_ms if duration_ms else (self.duration * 1000 if self.duration else None)
+        cache_key = (duration, skip_none)
+        source_items = self.items()
+        fingerprint = tuple((lang, id(lyrics_data), len(lyrics_data)) for lang, lyrics_data in source_items)
+        cached = self._full_timestamps_cache.get(cache_key)
+        if cached is None or cached[0] != fingerprint:
+            cached = (fingerprint, {lang: get_full_timestamps_lyrics_data(data=lyrics_data,
+                                                                          duration=duration,
+                                                                          only_line=False,
+                                                                          skip_none=skip_none)
+                                    for lang, lyrics_data in source_items})
+            self._full_timestamps_cache[cache_key] = cached
+
         full_timestamps_lyrics = Lyrics({"source": self.source,
                                          "title": self.title,
                                          "artist": self.artist,
@@ -183,14 +621,11 @@ class Lyrics(dict):
                                          "duration": self.duration,
                                          "accesskey": self.accesskey})
 
-        duration = duration_ms if duration_ms else (self.duration * 1000 if self.duration else None)
-        full_timestamps_lyrics.types = self.types
         full_timestamps_lyrics.tags = self.tags
-        for lang, lyrics_data in self.items():
-            full_timestamps_lyrics[lang] = get_full_timestamps_lyrics_data(data=lyrics_data,
-                                                                           duration=duration,
-                                                                           only_line=False,
-                                                                           skip_none=skip_none)
+        full_timestamps_lyrics.update(cached[1])
+        # 类型沿用原歌词的判断结果(与原先复制types相同), 不按补全后的歌词重新判断
+        types = self.types
+        full_timestamps_lyrics._types = {lang: (lyrics_data, len(lyrics_data), types[lang]) for lang, lyrics_data in cached[1].items()}
         return full_timestamps_lyrics
 
     def is_inst(self) -> bool:
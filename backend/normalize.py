@@ -0,0 +1,65 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""标题与歌手名的规范化
+
+同一字符串在匹配时会与多个候选比较, 规范化结果按原字符串缓存
+"""
+from functools import lru_cache
+
+NORMALIZE_CACHE_SIZE = 4096
+
+symbol_map = {
+    '（': '(',
+    '）': ')',
+    '：': ':',
+    '！': '!',
+    '？': '?',
+    '／': '/',
+    '＆': '&',
+    '＊': '*',
+    '＠': '@',
+    '＃': '#',
+    '＄': '$',
+    '％': '%',
+    '＼': '\\',
+    '｜': '|',
+    '＝': '=',
+    '＋': '+',
+    '－': '-',
+    '＜': '<',
+    '＞': '>',
+    '［': '[',
+    '］': ']',
+    '｛': '{',
+    '｝': '}',
+}
+
+# 全角符号转为半角, 空白字符(与正则表达式的\s相同, 最大为U+3000)转为空格
+UNIFIED_SYMBOL_TABLE = str.maketrans({**symbol_map, **{chr(c): " " for c in range(0x3001) if chr(c).isspace()}})
+# artist_str2list在拆分前统一的符号
+ARTIST_SYMBOL_TABLE = str.maketrans({'·': '・', '（': '(', '）': ')', '：': ':'})
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def unified_symbol(text: str) -> str:
+    """去除首尾空白, 统一全角符号与空白字符"""
+    return text.strip().translate(UNIFIED_SYMBOL_TABLE)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_title(title: str) -> str:
+    """用于比较的标题(统一符号并转为小写)"""
+    return unified_symbol(title).lower()
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_artist(artist: str) -> str:
+    """artist_str2list拆分前的歌手字符串"""
+    if all(len(s) == 1 for s in artist.split(" ")):
+        artist = "".join(artist.split(" "))
+    return artist.strip().translate(ARTIST_SYMBOL_TABLE)
+
+
+def cache_info() -> dict[str, object]:
+    """各规范化函数的缓存命中情况"""
+    return {func.__name__: func.cache_info() for func in (unified_symbol, normalize_title, normalize_artist)}
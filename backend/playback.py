@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple
+
+from backend.lyrics import Lyrics, LyricsData, LyricsLine, LyricsWord
+
+
+class PlaybackPosition(NamedTuple):
+    """播放位置对应的歌词"""
+
+    line_index: int  # 歌词行在PlaybackIndex.lyrics[lang]中的索引
+    line: LyricsLine
+    word_index: int | None  # 字在行中的索引(行内没有已开始的字时为None)
+    word: LyricsWord | None
+    progress: float  # 字的播放进度(0~1), 没有字时为行的播放进度
+
+
+class _LanguageIndex:
+    __slots__ = ("line_ends", "line_indexes", "line_starts", "lines", "word_ends", "word_starts")
+
+    def __init__(self, lines: list[LyricsLine]) -> None:
+        # 按起始时间排序(合并的多语言歌词中起始时间可能不递增)
+        order = sorted((i for i, line in enumerate(lines) if line[0] is not None), key=lambda i: lines[i][0])
+        self.lines = lines
+        self.line_indexes = order
+        self.line_starts = [lines[i][0] for i in order]
+        self.line_ends = [lines[i][1] for i in order]
+        self.word_starts = [[word[0] for word in lines[i][2]] for i in order]
+        self.word_ends = [[word[1] for word in lines[i][2]] for i in order]
+
+
+def _progress(position: int, start: int | None, end: int | None) -> float:
+    if start is None or end is None or end <= start:
+        return 1.0
+    return min(max((position - start) / (end - start), 0.0), 1.0)
+
+
+class PlaybackIndex:
+    """播放时查询当前歌词行与字的索引(每次查询O(log n))
+
+    构建时推算完整时间戳(跳过无法推算的行与字, 结果保存在lyrics属性中), 每种语言保存按起始时间排序的行与字起始时间
+    """
+
+    def __init__(self, lyrics: Lyrics, duration_ms: int | None = None) -> None:
+        """构建各语言的索引
+
+        :param lyrics: 歌词
+        :param duration_ms: 歌曲时长(用于推算最后一行的结束时间)
+        """
+        self.lyrics: dict[str, LyricsData] = {lang: LyricsData(list(lyrics_data))
+                                              for lang, lyrics_data in lyrics.get_full_timestamps_lyrics(duration_ms, skip_none=True).items()}
+        self._languages = {lang: _LanguageIndex(lyrics_data) for lang, lyrics_data in self.lyrics.items()}
+
+    @property
+    def langs(self) -> list[str]:
+        return list(self._languages)
+
+    def lookup(self, lang: str, position: int) -> PlaybackPosition | None:
+        """查询播放位置对应的歌词
+
+        :param lang: 歌词类型
+        :param position: 播放位置(毫秒)
+        :return: 起始时间不晚于播放位置的最后一行(有多行起始时间相同时为其中第一行)及其中的当前字, 还没有开始的行时返回None
+        """
+        index = self._languages[lang]
+        i = bisect_right(index.line_starts, position) - 1
+        if i < 0:
+            return None
+        # 起始时间相同的行(如合并的翻译)取第一行
+        i = bisect_left(index.line_starts, index.line_starts[i], 0, i)
+        line = index.lines[index.line_indexes[i]]
+
+        word_starts = index.word_starts[i]
+        j = bisect_right(word_starts, position) - 1
+        if j < 0:
+            return PlaybackPosition(index.line_indexes[i], line, None, None, _progress(position, index.line_starts[i], index.line_ends[i]))
+        return PlaybackPosition(index.line_indexes[i], line, j, line[2][j], _progress(position, word_starts[j], index.word_ends[i][j]))
@@ -0,0 +1,18 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""性能测试
+
+在仓库根目录下以模块方式运行, 如: python -m benchmarks.tripledes
+"""
+import time
+from collections.abc import Callable
+
+
+def timeit(func: Callable[[], object], repeat: int = 3) -> float:
+    """返回多次运行中最短的耗时(秒)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
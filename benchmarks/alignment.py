@@ -0,0 +1,102 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""按起始时间匹配歌词行: 原实现(所有行对排序) 与 match_by_start_time(相邻时间 + 堆) 对比
+
+以及网易云逐字原文通过逐行原文匹配翻译: 原实现(逐对is_same_line) 与 按行比较键索引 对比
+"""
+import random
+
+from backend.calculate import find_closest_match, is_same_line, match_by_start_time
+from backend.lyrics import LyricsData, LyricsLine, LyricsWord
+from utils.enum import Source
+
+from . import timeit
+from .corpus import make_lines
+
+LINE_COUNTS = (50, 200, 1000, 2000)
+
+
+def legacy_match(data1: LyricsData, data2: LyricsData) -> dict[int, int]:
+    time_difference_list = [(i1, i2, abs(s1 - s2)) for i1, (s1, e1, t1) in enumerate(data1) if isinstance(s1, int)
+                            for i2, (s2, e2, t2) in enumerate(data2) if isinstance(s2, int)]
+    time_difference_list = sorted(time_difference_list, key=lambda x: x[2])
+
+    matched = {}
+    used_i1, used_i2 = set(), set()
+    for i1, i2, _diff in time_difference_list:
+        if i1 not in used_i1 and i2 not in used_i2:
+            used_i1.add(i1)
+            used_i2.add(i2)
+            matched[i1] = i2
+            if len(used_i1) == len(data1) or len(used_i2) == len(data2):
+                break
+
+    return matched
+
+
+def legacy_ne_match(data1: LyricsData, data2: LyricsData, data3: LyricsData) -> dict[int, int]:
+    data3_matched = match_by_start_time(data3, data2)
+    matched = {}
+    for i1, line1 in enumerate(data1):
+        for i3, i2 in data3_matched.items():
+            if is_same_line(line1, data3[i3]):
+                matched[i1] = i2
+                data3_matched.pop(i3)
+                break
+    return matched
+
+
+def make_translation(data: LyricsData, rng: random.Random) -> LyricsData:
+    """模拟翻译: 部分行缺失, 起始时间有偏差或为None"""
+    result = LyricsData([])
+    for line_start, end, _words in data:
+        if rng.random() < 0.1:
+            continue
+        start = line_start
+        if rng.random() < 0.03:
+            start = None
+        elif rng.random() < 0.5:
+            start = line_start + rng.randint(-300, 300)
+        result.append(LyricsLine((start, end, [])))
+    return result
+
+
+def main() -> None:
+    rng = random.Random(0)
+    for _ in range(3000):
+        data1 = LyricsData([LyricsLine((rng.choice((None, rng.randint(0, 30))), None, [])) for _ in range(rng.randint(0, 20))])
+        data2 = LyricsData([LyricsLine((rng.choice((None, rng.randint(0, 30))), None, [])) for _ in range(rng.randint(0, 20))])
+        if list(match_by_start_time(data1, data2).items()) != list(legacy_match(data1, data2).items()):
+            msg = "随机数据结果不一致"
+            raise AssertionError(msg)
+
+    print(f"{'lines':>6} {'legacy ms':>10} {'new ms':>8}")
+    for line_count in LINE_COUNTS:
+        data1 = LyricsData([LyricsLine(line) for line in make_lines(line_count)])
+        data2 = make_translation(data1, rng)
+        if list(match_by_start_time(data1, data2).items()) != list(legacy_match(data1, data2).items()):
+            msg = f"{line_count} 行结果不一致"
+            raise AssertionError(msg)
+        legacy_time = timeit(lambda data1=data1, data2=data2: legacy_match(data1, data2), repeat=1) * 1000
+        new_time = timeit(lambda data1=data1, data2=data2: match_by_start_time(data1, data2)) * 1000
+        print(f"{line_count:>6} {legacy_time:>10.2f} {new_time:>8.2f}")
+
+    print(f"{'NE lines':>8} {'legacy ms':>10} {'new ms':>8}")
+    for line_count in LINE_COUNTS:
+        data1 = LyricsData([LyricsLine(line) for line in make_lines(line_count)])
+        # 逐行原文: 时间与逐字歌词略有不同, 部分行有括号内的和声
+        data3 = LyricsData([LyricsLine((start + rng.randint(-50, 50), end, [LyricsWord((start, end, "".join(word[2] for word in words) +
+                                                                                       rng.choice(("", "", " (ah)"))))]))
+                            for start, end, words in data1])
+        data2 = make_translation(data3, rng)
+        expected = legacy_ne_match(data1, data2, data3)
+        if list(find_closest_match(data1, data2, data3, Source.NE).items()) != list(expected.items()):
+            msg = f"NE {line_count} 行结果不一致"
+            raise AssertionError(msg)
+        legacy_time = timeit(lambda data1=data1, data2=data2, data3=data3: legacy_ne_match(data1, data2, data3), repeat=1) * 1000
+        new_time = timeit(lambda data1=data1, data2=data2, data3=data3: find_closest_match(data1, data2, data3, Source.NE)) * 1000
+        print(f"{line_count:>8} {legacy_time:>10.2f} {new_time:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
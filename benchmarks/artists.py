@@ -0,0 +1,53 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""歌手解析: 每次解析 与 parse_artist缓存 的单次耗时与命中率, 以及预先解析查询歌手时的评分耗时"""
+from backend import calculate
+from backend.calculate import artist_str2list, calculate_artist_score, parse_artist
+
+from . import timeit
+from .matching import make_candidates, make_queries
+
+QUERY_COUNT = 50
+CANDIDATE_COUNT = 60
+SCORE_REPEAT = 7  # 两种评分方式交替运行, 减少机器状态变化对比较的影响
+
+
+def main() -> None:
+    jobs = [(query, make_candidates(query, CANDIDATE_COUNT)) for query in make_queries(QUERY_COUNT)]
+    artists = [query["artist"] for query, _ in jobs]
+
+    uncached_time = timeit(lambda: [calculate._artist_str2list(artist) for artist in artists])  # noqa: SLF001
+    parse_artist.cache_clear()
+    parse_artist(artists[0])
+    cached_time = timeit(lambda: [parse_artist(artist) for artist in artists])
+    copy_time = timeit(lambda: [artist_str2list(artist) for artist in artists])
+    print(f"per call: parse {uncached_time / len(artists) * 1e6:.2f} us, cached {cached_time / len(artists) * 1e6:.2f} us, "
+          f"cached + list copy {copy_time / len(artists) * 1e6:.2f} us")
+
+    def score(parsed: bool) -> None:
+        for query, candidates in jobs:
+            artist = parse_artist(query["artist"]) if parsed else query["artist"]
+            for candidate in candidates:
+                calculate_artist_score(artist, candidate["artist"])
+
+    for query, candidates in jobs:
+        parsed = parse_artist(query["artist"])
+        for candidate in candidates:
+            if calculate_artist_score(parsed, candidate["artist"]) != calculate_artist_score(query["artist"], candidate["artist"]):
+                msg = f"{query['artist']} 结果不一致"
+                raise AssertionError(msg)
+
+    parse_artist.cache_clear()
+    cold_time = timeit(lambda: score(False), repeat=1) * 1000
+    info = parse_artist.cache_info()
+    string_time = parsed_time = float("inf")
+    for _ in range(SCORE_REPEAT):
+        string_time = min(string_time, timeit(lambda: score(False), repeat=1) * 1000)
+        parsed_time = min(parsed_time, timeit(lambda: score(True), repeat=1) * 1000)
+    print(f"calculate_artist_score {QUERY_COUNT} x {CANDIDATE_COUNT}: cold cache {cold_time:.1f} ms, "
+          f"warm cache {string_time:.1f} ms, ParsedArtist query {parsed_time:.1f} ms")
+    print(f"parse_artist during cold run: {info.hits} hits / {info.misses} misses ({info.hits / max(info.hits + info.misses, 1):.0%})")
+
+
+if __name__ == "__main__":
+    main()
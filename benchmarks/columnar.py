@@ -0,0 +1,59 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""LyricsData(元组与列表) 与 ColumnarLyricsData 的内存占用对比
+
+python -m benchmarks.columnar [qrc文件 ...]
+不指定文件时使用生成的qrc, 可指定QQ音乐下载的本地qrc文件(*_qm.qrc)以测量真实歌词
+"""
+import sys
+
+from backend.decryptor import qrc_decrypt
+from backend.fetcher.qm import qrc2list
+from backend.lyrics import ColumnarLyricsData, LyricsData
+from utils.enum import QrcType
+
+from . import timeit
+from .corpus import make_qrc
+
+LINE_COUNTS = (50, 200, 1000)
+
+
+def deep_sizeof(obj: object, seen: set[int] | None = None) -> int:
+    """对象及其引用的所有元组/列表/字符串/整数占用的内存(共享的对象只计算一次)"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or obj is None:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, tuple | list):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+def samples() -> list[tuple[str, LyricsData]]:
+    if len(sys.argv) > 1:
+        result = []
+        for path in sys.argv[1:]:
+            with open(path, "rb") as f:
+                result.append((path, qrc2list(qrc_decrypt(f.read(), QrcType.LOCAL))[1]))
+        return result
+    return [(f"generated {line_count} lines", qrc2list(make_qrc(line_count))[1]) for line_count in LINE_COUNTS]
+
+
+def main() -> None:
+    print(f"{'sample':>24} {'words':>6} {'tuples KB':>10} {'columnar KB':>12} {'ratio':>6} {'convert ms':>11}")
+    for name, data in samples():
+        columnar = ColumnarLyricsData.from_lyrics_data(data)
+        if columnar.to_lyrics_data() != data:
+            msg = f"{name} 转换结果不一致"
+            raise AssertionError(msg)
+        tuples_size = deep_sizeof(data)
+        columnar_size = columnar.nbytes()
+        convert_time = timeit(lambda data=data: ColumnarLyricsData.from_lyrics_data(data)) * 1000
+        print(f"{name[-24:]:>24} {len(columnar.word_starts):>6} {tuples_size / 1024:>10.1f} {columnar_size / 1024:>12.1f} "
+              f"{tuples_size / columnar_size:>5.1f}x {convert_time:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
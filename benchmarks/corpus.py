@@ -0,0 +1,119 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""生成可复现的(加密)歌词语料
+
+python -m benchmarks.corpus <目录> 会将加密歌词写入目录(可用于测试本地批量解密)
+"""
+import json
+import os
+import random
+import sys
+
+from backend.decryptor import krc_encrypt, qrc_encrypt
+from backend.decryptor.eapi import EAPI_KEY, aes_encrypt
+from utils.enum import QrcType
+
+SIZES = (50, 200, 1000, 5000)  # 行数
+SEED = 0
+
+_CHARS = "あいうえおかきくけこさしすせそ爱你我他的是在不了有这心梦风花雪月天空ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _words(rng: random.Random, line_start: int) -> tuple[list[tuple[int, int, str]], int]:
+    """生成一行的逐字数据 [(字起始时间, 字时长, 字内容)], 行时长"""
+    words = []
+    time = line_start
+    for _ in range(rng.randint(4, 12)):
+        duration = rng.randint(80, 600)
+        words.append((time, duration, rng.choice(_CHARS) * rng.randint(1, 2)))
+        time += duration
+    return words, time - line_start
+
+
+def make_lines(line_count: int, seed: int = SEED) -> list[tuple[int, int, list[tuple[int, int, str]]]]:
+    """生成歌词行 [(行起始时间, 行时长, [(字起始时间, 字时长, 字内容)])]"""
+    rng = random.Random(seed)
+    lines = []
+    time = rng.randint(0, 5000)
+    for _ in range(line_count):
+        words, duration = _words(rng, time)
+        lines.append((time, duration, words))
+        time += duration + rng.randint(0, 2000)
+    return lines
+
+
+def make_qrc(line_count: int, seed: int = SEED) -> str:
+    content = "[ti:benchmark]\n[ar:benchmark]\n[offset:0]\n"
+    content += "\n".join(f"[{start},{duration}]" + "".join(f"{text}({w_start},{w_duration})" for w_start, w_duration, text in words)
+                         for start, duration, words in make_lines(line_count, seed))
+    return ('<?xml version="1.0" encoding="utf-8"?>\n<QrcInfos>\n<QrcHeadInfo SaveTime="0" Version="100"/>\n<LyricInfo LyricCount="1">\n'
+            f'<Lyric_1 LyricType="1" LyricContent="{content}\n"/>\n</LyricInfo>\n</QrcInfos>')
+
+
+def make_krc(line_count: int, seed: int = SEED) -> str:
+    content = "[id:$00000000]\n[ar:benchmark]\n[ti:benchmark]\n[offset:0]\n"
+    content += "\n".join(f"[{start},{duration}]" + "".join(f"<{w_start - start},{w_duration},0>{text}" for w_start, w_duration, text in words)
+                         for start, duration, words in make_lines(line_count, seed))
+    return content + "\n"
+
+
+def make_yrc(line_count: int, seed: int = SEED) -> str:
+    return "\n".join(f"[{start},{duration}]" + "".join(f"({w_start},{w_duration},0){text}" for w_start, w_duration, text in words)
+                     for start, duration, words in make_lines(line_count, seed)) + "\n"
+
+
+def _ms2lrc(ms: int) -> str:
+    return f"{ms // 60000:02d}:{ms // 1000 % 60:02d}.{ms % 1000 // 10:02d}"
+
+
+def make_lrc(line_count: int, seed: int = SEED) -> str:
+    return "[ti:benchmark]\n" + "\n".join(f"[{_ms2lrc(start)}]" + "".join(text for _, _, text in words)
+                                         for start, _duration, words in make_lines(line_count, seed)) + "\n"
+
+
+def make_multi_lrc(line_count: int, tracks: int = 3, seed: int = SEED) -> str:
+    """生成多条轨道共用时间戳的lrc(如网易云合并后的歌词), 约line_count行
+
+    第一条轨道为逐字(字[mm:ss.xx]), 其余为逐行, 每组之后有一个空行时间戳
+    """
+    lines = ["[ti:benchmark]", "[ar:benchmark]"]
+    for start, duration, words in make_lines(line_count // (tracks + 1), seed):
+        lines.append(f"[{_ms2lrc(start)}]" + "".join(f"{text}[{_ms2lrc(w_start + w_duration)}]" for w_start, w_duration, text in words))
+        lines.extend(f"[{_ms2lrc(start)}]" + f"track{track} " + "".join(text for _, _, text in words) for track in range(1, tracks))
+        lines.append(f"[{_ms2lrc(start + duration)}]")
+    return "\n".join(lines) + "\n"
+
+
+def make_eapi_response(song_count: int, seed: int = SEED) -> bytes:
+    """生成类似/eapi/v3/song/detail的加密响应"""
+    rng = random.Random(seed)
+    songs = [{"id": rng.randint(1, 2 ** 31), "name": "".join(rng.choices(_CHARS, k=8)), "ar": [{"name": "".join(rng.choices(_CHARS, k=4))}],
+              "al": {"name": "".join(rng.choices(_CHARS, k=6))}, "dt": rng.randint(60000, 400000), "alia": []}
+             for _ in range(song_count)]
+    return aes_encrypt(json.dumps({"songs": songs, "code": 200}, ensure_ascii=False), EAPI_KEY)
+
+
+def generate_corpus(sizes: tuple[int, ...] = SIZES, seed: int = SEED) -> dict[str, dict[int, bytes]]:
+    """生成加密语料 {类型: {行数(eapi为歌曲数): 密文}}"""
+    return {
+        "qrc_cloud": {size: qrc_encrypt(make_qrc(size, seed)) for size in sizes},
+        "qrc_local": {size: qrc_encrypt(make_qrc(size, seed), QrcType.LOCAL) for size in sizes},
+        "krc": {size: krc_encrypt(make_krc(size, seed)) for size in sizes},
+        "eapi": {size: make_eapi_response(size, seed) for size in sizes},
+    }
+
+
+def write_corpus(directory: str, sizes: tuple[int, ...] = SIZES, seed: int = SEED) -> None:
+    """将加密歌词写入目录(qrc的原文与翻译为同一组)"""
+    os.makedirs(directory, exist_ok=True)
+    for size in sizes:
+        qrc = qrc_encrypt(make_qrc(size, seed), QrcType.LOCAL)
+        for suffix in ("_qm.qrc", "_qmts.qrc"):
+            with open(os.path.join(directory, f"{size}{suffix}"), "wb") as f:
+                f.write(qrc)
+        with open(os.path.join(directory, f"{size}.krc"), "wb") as f:
+            f.write(krc_encrypt(make_krc(size, seed)))
+
+
+if __name__ == "__main__":
+    write_corpus(sys.argv[1])
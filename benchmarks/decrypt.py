@@ -0,0 +1,95 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""按阶段测试各解密器, 并将结果写入JSON
+
+python -m benchmarks.decrypt [--output bench_decrypt.json] [--sizes 50 200 1000]
+"""
+import argparse
+import json
+import platform
+import zlib
+
+from backend.decryptor import KRC_KEY, QRC_KEY, krc_decrypt, qrc_decrypt
+from backend.decryptor.eapi import eapi_response_decrypt
+from backend.decryptor.qmc1 import qmc1_decrypt
+from backend.decryptor.tripledes import DECRYPT, tripledes_crypt_block, tripledes_key_setup
+from backend.decryptor.xor import repeat_key, xor_bytes
+from utils.enum import QrcType
+
+from . import timeit
+from .corpus import SEED, SIZES, generate_corpus
+
+
+def tripledes_stage(data: bytes | bytearray) -> bytearray:
+    schedule = tripledes_key_setup(QRC_KEY, DECRYPT)
+    view = memoryview(data)
+    result = bytearray(len(view))
+    for i in range(0, len(view), 8):
+        result[i:i + 8] = tripledes_crypt_block(int.from_bytes(view[i:i + 8], "big"), schedule).to_bytes(8, "big")
+    return result
+
+
+def inflate_stage(data: bytes | bytearray) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+def qrc_stages(encrypted: bytes, qrc_type: QrcType) -> dict[str, float]:
+    stages = {}
+    if qrc_type == QrcType.LOCAL:
+        stages["qmc1"] = timeit(lambda: qmc1_decrypt(bytearray(encrypted)))
+        data = bytearray(encrypted)
+        qmc1_decrypt(data)
+        encrypted = bytes(data[11:])
+    stages["tripledes"] = timeit(lambda: tripledes_stage(encrypted))
+    decrypted = tripledes_stage(encrypted)
+    stages["inflate"] = timeit(lambda: inflate_stage(decrypted))
+    return stages
+
+
+def krc_stages(encrypted: bytes) -> dict[str, float]:
+    data = encrypted[4:]
+    stages = {"xor": timeit(lambda: xor_bytes(data, repeat_key(KRC_KEY, len(data))))}
+    decrypted = xor_bytes(data, repeat_key(KRC_KEY, len(data)))
+    stages["inflate"] = timeit(lambda: inflate_stage(decrypted))
+    return stages
+
+
+def run(sizes: tuple[int, ...] = SIZES, seed: int = SEED) -> dict:
+    corpus = generate_corpus(sizes, seed)
+    results = []
+    for size in sizes:
+        for name, encrypted in (("qrc_cloud", corpus["qrc_cloud"][size]), ("qrc_local", corpus["qrc_local"][size])):
+            qrc_type = QrcType.LOCAL if name == "qrc_local" else QrcType.CLOUD
+            stages = qrc_stages(encrypted, qrc_type)
+            stages["total"] = timeit(lambda encrypted=encrypted, qrc_type=qrc_type: qrc_decrypt(encrypted, qrc_type))
+            results.append({"format": name, "size": size, "bytes": len(encrypted), "seconds": stages})
+
+        encrypted = corpus["krc"][size]
+        stages = krc_stages(encrypted)
+        stages["total"] = timeit(lambda encrypted=encrypted: krc_decrypt(encrypted))
+        results.append({"format": "krc", "size": size, "bytes": len(encrypted), "seconds": stages})
+
+        encrypted = corpus["eapi"][size]
+        stages = {"total": timeit(lambda encrypted=encrypted: eapi_response_decrypt(encrypted), repeat=1)}
+        results.append({"format": "eapi", "size": size, "bytes": len(encrypted), "seconds": stages})
+
+    return {"python": platform.python_version(), "seed": seed, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", default="bench_decrypt.json")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--seed", type=int, default=SEED)
+    arg = parser.parse_args()
+
+    report = run(tuple(arg.sizes), arg.seed)
+    with open(arg.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    for result in report["results"]:
+        stages = ", ".join(f"{stage} {seconds * 1000:.2f}ms" for stage, seconds in result["seconds"].items())
+        print(f"{result['format']:>9} {result['size']:>5} ({result['bytes']} B): {stages}")
+
+
+if __name__ == "__main__":
+    main()
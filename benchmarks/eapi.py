@@ -0,0 +1,40 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""eapi AES-ECB: 逐块拼接(bytes +=)与批量解密吞吐量对比"""
+import os
+
+from pyaes import AESModeOfOperationECB
+
+from backend.decryptor.eapi import EAPI_KEY, aes_encrypt, eapi_response_decrypt, pkcs7_unpad
+
+from . import timeit
+
+
+def loop_aes_decrypt(cipher_buffer: bytes, key: bytes) -> bytes:
+    aes = AESModeOfOperationECB(key)
+    decrypted_data = b''
+    for i in range(0, len(cipher_buffer), 16):
+        decrypted_data += aes.decrypt(cipher_buffer[i:i + 16])
+    return pkcs7_unpad(decrypted_data)
+
+
+def main() -> None:
+    print(f"{'size':>8} {'loop MB/s':>10} {'batch MB/s':>11} {'stream MB/s':>12}")
+    for kb in (16, 64, 256, 1024):
+        data = os.urandom(kb * 1024)
+        encrypted = aes_encrypt(data, EAPI_KEY)
+        chunks = [encrypted[i:i + 65536] for i in range(0, len(encrypted), 65536)]
+        if eapi_response_decrypt(encrypted) != data or eapi_response_decrypt(iter(chunks)) != data:
+            msg = "解密结果不正确"
+            raise AssertionError(msg)
+
+        mb = kb / 1024
+        # 逐块拼接为平方复杂度, 只测试较小的数据
+        loop = f"{mb / timeit(lambda encrypted=encrypted: loop_aes_decrypt(encrypted, EAPI_KEY), repeat=1):.3f}" if kb <= 256 else "-"
+        batch = mb / timeit(lambda encrypted=encrypted: eapi_response_decrypt(encrypted), repeat=1)
+        stream = mb / timeit(lambda chunks=chunks: eapi_response_decrypt(iter(chunks)), repeat=1)
+        print(f"{kb:>6}KB {loop:>10} {batch:>11.3f} {stream:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""推算完整时间戳: 原实现 与 逐行实现(LyricsData)/数组实现(ColumnarLyricsData)/缓存 对比"""
+from backend import lyrics as lyrics_module
+from backend.fetcher.qm import qrc2list
+from backend.fetcher.share import lrc2list
+from backend.lyrics import ColumnarLyricsData, Lyrics, LyricsData, LyricsLine, get_full_timestamps_lyrics_data
+
+from . import timeit
+from .corpus import make_multi_lrc, make_qrc
+
+LINE_COUNTS = (200, 2000)
+DURATION = 300000
+
+
+def legacy_get_full_timestamps_lyrics_data(data: LyricsData, duration: int | None, only_line: bool = False, skip_none: bool = False) -> LyricsData:
+    result = LyricsData([])
+    for i, line in enumerate(data):
+        line_start_time = line[2][0][0] if line[0] is None and line[2] and line[2][0][0] is not None else line[0]
+        line_end_time = line[2][-1][1] if line[1] is None and line[2] and line[2][-1][1] is not None else line[1]
+        if line_start_time is None:
+            if i == 0:
+                line_start_time = 0
+            elif data[i - 1][1] is not None:
+                line_start_time = data[i - 1][1]
+            elif skip_none:
+                continue
+
+        if line_end_time is None:
+            if i == len(data) - 1:
+                line_end_time = duration
+            elif data[i + 1][0] is not None:
+                line_end_time = data[i + 1][0]
+            elif skip_none:
+                continue
+
+        if only_line:
+            result.append(LyricsLine((line_start_time, line_end_time, line[2])))
+            continue
+
+        words = []
+        for j, word in enumerate(line[2]):
+            word_start_time = word[0]
+            word_end_time = word[1]
+            if word_start_time is None:
+                if j == 0 and line_start_time:
+                    word_start_time = line_start_time
+                elif j != 0 and line[2][j - 1][1] is not None:
+                    word_start_time = line[2][j - 1][1]
+                elif skip_none:
+                    continue
+
+            if word_end_time is None:
+                if j == len(line[2]) - 1 and line_end_time:
+                    word_end_time = line_end_time
+                elif j != len(line[2]) - 1 and line[2][j + 1][0] is not None:
+                    word_end_time = line[2][j + 1][0]
+                elif skip_none:
+                    continue
+
+            words.append((word_start_time, word_end_time, word[2]))
+
+        result.append(LyricsLine((line_start_time, line_end_time, words)))
+    return result
+
+
+def main() -> None:
+    print(f"NumPy: {'yes' if lyrics_module.np is not None else 'no'}")
+    print(f"{'input':>8} {'lines':>6} {'legacy ms':>10} {'tuples ms':>10} {'columnar ms':>12} {'cached ms':>10}")
+    for line_count in LINE_COUNTS:
+        for name, data in (("qrc", qrc2list(make_qrc(line_count))[1]), ("3-track", lrc2list(make_multi_lrc(line_count))[1])):
+            columnar = ColumnarLyricsData.from_lyrics_data(data)
+            for skip_none in (False, True):
+                expected = legacy_get_full_timestamps_lyrics_data(data, DURATION, skip_none=skip_none)
+                if (get_full_timestamps_lyrics_data(data, DURATION, skip_none=skip_none) != expected or
+                        get_full_timestamps_lyrics_data(columnar, DURATION, skip_none=skip_none).to_lyrics_data() != expected):
+                    msg = f"{name} 结果不一致"
+                    raise AssertionError(msg)
+
+            lyrics = Lyrics()
+            lyrics["orig"] = data
+            lyrics.get_full_timestamps_lyrics(DURATION)
+            legacy_time = timeit(lambda data=data: legacy_get_full_timestamps_lyrics_data(data, DURATION)) * 1000
+            tuples_time = timeit(lambda data=data: get_full_timestamps_lyrics_data(data, DURATION)) * 1000
+            columnar_time = timeit(lambda columnar=columnar: get_full_timestamps_lyrics_data(columnar, DURATION)) * 1000
+            cached_time = timeit(lambda lyrics=lyrics: lyrics.get_full_timestamps_lyrics(DURATION)) * 1000
+            print(f"{name:>8} {line_count:>6} {legacy_time:>10.2f} {tuples_time:>10.2f} {columnar_time:>12.2f} {cached_time:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
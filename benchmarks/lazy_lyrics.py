@@ -0,0 +1,74 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""获取歌词后只访问原文 与 访问所有歌词(相当于原先的立即解析) 的耗时对比
+
+接口请求被替换为返回预先生成的响应, 只测量解密与解析
+"""
+from backend.decryptor import qrc_encrypt
+from backend.fetcher import ne, qm
+from backend.lyrics import Lyrics, LyricsData, LyricsLine
+
+from . import timeit
+from .corpus import make_lrc, make_qrc, make_yrc
+
+LINE_COUNTS = (50, 200, 1000)
+
+
+def qm_response(line_count: int) -> dict:
+    return {"lyric": qrc_encrypt(make_qrc(line_count)).hex(), "qrc_t": 1, "lrc_t": "1",
+            "trans": qrc_encrypt(make_lrc(line_count, seed=1)).hex(), "trans_t": "1",
+            "roma": qrc_encrypt(make_qrc(line_count, seed=2)).hex(), "roma_t": "1"}
+
+
+def ne_response(line_count: int) -> dict:
+    return {"yrc": {"lyric": make_yrc(line_count)}, "lrc": {"lyric": make_lrc(line_count)},
+            "tlyric": {"lyric": make_lrc(line_count, seed=1)}, "romalrc": {"lyric": make_lrc(line_count, seed=2)}}
+
+
+def fetch(module: object, info: dict, access_all: bool) -> None:
+    lyrics = Lyrics(info)
+    module.get_lyrics(lyrics)
+    if access_all:
+        lyrics.items()
+    else:
+        lyrics["orig"]
+
+
+def check_dict_interface() -> None:
+    """字典接口不返回未解析的歌词, 修改歌词后清除缓存"""
+    lyrics = Lyrics({"duration": 1})
+    lyrics["orig"] = LyricsData([LyricsLine((0, None, [(0, None, "old")]))])
+    lyrics.set_lazy("ts", make_lrc(2), ne.lrc_str2list)
+    if "object at" in repr(lyrics) or "<lazy>" not in repr(lyrics):
+        msg = "repr中出现未解析的歌词"
+        raise AssertionError(msg)
+
+    lyrics.get_full_timestamps_lyrics(1000)
+    new = LyricsData([LyricsLine((0, None, [(0, None, "new")]))])
+    lyrics |= {"orig": new}
+    if lyrics.get_full_timestamps_lyrics(1000)["orig"][0][2][0][2] != "new":
+        msg = "|=后完整时间戳的缓存未清除"
+        raise AssertionError(msg)
+    merged = lyrics | {"roma": new}
+    if type(merged) is not dict or merged["ts"] != lyrics["ts"] or merged["roma"] is not new:
+        msg = "|的结果不正确"
+        raise AssertionError(msg)
+
+
+def main() -> None:
+    check_dict_interface()
+    info = {"title": "benchmark", "artist": ["benchmark"], "album": "benchmark", "id": 1, "duration": 300}
+    print(f"{'source':>6} {'lines':>6} {'all ms':>8} {'orig ms':>8} {'ratio':>6}")
+    for line_count in LINE_COUNTS:
+        for name, module, response in (("qm", qm, qm_response(line_count)), ("ne", ne, ne_response(line_count))):
+            if module is qm:
+                qm.qm_get_lyrics = lambda *_args, response=response: response
+            else:
+                ne.ne_get_lyrics = lambda *_args, response=response: response
+            all_time = timeit(lambda module=module: fetch(module, info, access_all=True)) * 1000
+            orig_time = timeit(lambda module=module: fetch(module, info, access_all=False)) * 1000
+            print(f"{name:>6} {line_count:>6} {all_time:>8.2f} {orig_time:>8.2f} {orig_time / all_time:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""歌手列表相似度: 原实现(计算所有项对后排序) 与 list_max_difference(上界 + 按需计算) 对比"""
+import random
+
+from backend import calculate
+from backend.calculate import list_max_difference, parse_artist
+
+from . import timeit
+from .matching import ARTISTS, make_artist_pairs
+
+PAIR_COUNT = 2000
+COLLABORATION_SIZES = (5, 10, 20)
+
+
+def legacy_list_max_difference(orig_list1: list, orig_list2: list, filter_empty: bool = True) -> float:
+    def list_str_max_difference(l1: list[str], l2: list[str]) -> float:
+        if filter_empty:
+            l1 = [item for item in l1 if item]
+            l2 = [item for item in l2 if item]
+        return max(calculate.text_difference(text1, text2) for text1 in l1 for text2 in l2)
+
+    list1 = [[item] if isinstance(item, str) else item for item in orig_list1]
+    list2 = [[item] if isinstance(item, str) else item for item in orig_list2]
+
+    if len(list1) >= len(list2) > 0:
+        scores = [(i1, i2, list_str_max_difference(l1, l2)) for i1, l1 in enumerate(list1) for i2, l2 in enumerate(list2)]
+    elif len(list2) >= len(list1) > 0:
+        scores = [(i2, i1, list_str_max_difference(l2, l1)) for i2, l2 in enumerate(list2) for i1, l1 in enumerate(list1)]
+    else:
+        return 0.0
+
+    scores.sort(key=lambda x: x[2], reverse=True)
+
+    total_score = 0.0
+    used_i1, used_i2 = set(), set()
+    for i1, i2, score in scores:
+        if i1 not in used_i1 and i2 not in used_i2:
+            used_i1.add(i1)
+            used_i2.add(i2)
+            total_score += score
+            if len(used_i1) == len(list1) or len(used_i2) == len(list2):
+                break
+
+    return total_score / max(len(list1), len(list2))
+
+
+def make_collaboration(size: int, rng: random.Random) -> tuple[list[list[str]], list[list[str]]]:
+    """合作曲目: 角色名(CV:歌手名), 另一方顺序打乱且部分写法不同"""
+    names = [[f"角色{i}", rng.choice(ARTISTS) + str(i)] for i in range(size)]
+    other = [[name[1].upper() if rng.random() < 0.3 else name[1]] for name in names]
+    rng.shuffle(other)
+    return names, other
+
+
+def count_calls(func: object, cases: list[tuple]) -> int:
+    calls = 0
+    original = calculate.text_difference
+
+    def counting(text1: str, text2: str) -> float:
+        nonlocal calls
+        calls += 1
+        return original(text1, text2)
+
+    calculate.text_difference = counting
+    try:
+        for list1, list2 in cases:
+            func(list1, list2)
+    finally:
+        calculate.text_difference = original
+    return calls
+
+
+def main() -> None:
+    rng = random.Random(0)
+    artist_cases = []
+    for artist1, artist2 in make_artist_pairs(PAIR_COUNT):
+        parsed = parse_artist(artist1)
+        artist_cases.append((list(parsed.groups) + [list(names) for names in parsed.artists], artist2))
+    suites = [("artist pairs", artist_cases)]
+    suites += [(f"{size} names", [make_collaboration(size, rng) for _ in range(20)]) for size in COLLABORATION_SIZES]
+
+    print(f"{'case':>14} {'legacy ms':>10} {'new ms':>8} {'legacy calls':>13} {'new calls':>10}")
+    for name, cases in suites:
+        for list1, list2 in cases:
+            if list_max_difference(list1, list2) != legacy_list_max_difference(list1, list2):
+                msg = f"{name} 结果不一致"
+                raise AssertionError(msg)
+        legacy_time = timeit(lambda cases=cases: [legacy_list_max_difference(list1, list2) for list1, list2 in cases]) * 1000
+        new_time = timeit(lambda cases=cases: [list_max_difference(list1, list2) for list1, list2 in cases]) * 1000
+        print(f"{name:>14} {legacy_time:>10.1f} {new_time:>8.1f} "
+              f"{count_calls(legacy_list_max_difference, cases):>13} {count_calls(list_max_difference, cases):>10}")
+
+
+if __name__ == "__main__":
+    main()
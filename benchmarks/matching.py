@@ -0,0 +1,96 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""生成可复现的歌曲匹配语料(查询与搜索结果), 用于标题/歌手评分相关的性能测试与结果对比"""
+import random
+
+from utils.enum import Source
+
+SEED = 0
+
+TITLES = [
+    "夜に駆ける", "アイドル", "紅蓮華", "残響散歌", "Lemon", "うっせぇわ", "ドライフラワー", "怪物", "群青", "炎",
+    "青鸟", "晴天", "稻香", "告白气球", "演员", "光年之外", "起风了", "孤勇者", "后来", "十年",
+    "Shape of You", "Blinding Lights", "Bad Guy", "Someone Like You", "Let It Go", "Hello", "Stay", "Believer",
+    "God knows...", "only my railgun", "Butter-Fly", "unravel", "Again", "シル・ヴ・プレジデント", "ようこそジャパリパークへ",
+    "Don't say \"lazy\"", "恋愛サーキュレーション", "secret base ～君がくれたもの～", "残酷な天使のテーゼ", "STAY ALIVE",
+]
+
+TITLE_TAGS = [
+    "", "", "", " (TV size ver.)", "（伴奏）", " - Instrumental", " (Off Vocal Ver.)", "(纯音乐)", " [Remix]", " (Live)",
+    " (anime edit)", " ～TV size～", " (Acoustic Version)", " (feat. Ado)", "(Piano ver.)", " -Re:Start-", " (English ver.)",
+    " (2019 Remastered)", "（Cover：周杰伦）", " (Short Ver.)",
+]
+
+ARTISTS = [
+    "YOASOBI", "Ado", "LiSA", "Aimer", "米津玄師", "King Gnu", "優里", "周杰伦", "林俊杰", "薛之谦", "Ed Sheeran", "The Weeknd",
+    "Billie Eilish", "Adele", "Taylor Swift", "Imagine Dragons", "平井堅", "宇多田ヒカル", "ClariS", "fripSide",
+    "放課後ティータイム", "ナナヲアカリ", "どうぶつビスケッツ×PPP", "Aqours", "μ's",
+]
+
+ARTIST_FORMS = [
+    "{a}", "{a}", "{a}/{b}", "{a}、{b}", "{a} & {b}", "{a},{b}", "{a} feat. {b}", "{a}({b})", "{a}（CV:{b}）",
+    "放課後ティータイム(平沢唯・秋山澪CV:豊崎愛生・日笠陽子)", "Aqours(高海千歌・桜内梨子)/CV:伊波杏樹・逢田梨香子",
+    "{a} feat.初音ミク({b})", "{a}・{b}", "{a}·{b}", "{a} {b}",
+]
+
+
+def _artist(rng: random.Random) -> str:
+    a, b = rng.sample(ARTISTS, 2)
+    return rng.choice(ARTIST_FORMS).format(a=a, b=b)
+
+
+def _vary(rng: random.Random, text: str) -> str:
+    """模拟不同平台的写法差异"""
+    match rng.randint(0, 5):
+        case 0:
+            return text.upper()
+        case 1:
+            return text.replace("(", "（").replace(")", "）").replace(":", "：")
+        case 2:
+            return f" {text} "
+        case 3:
+            return text.replace(" ", "　")
+    return text
+
+
+def make_queries(count: int, seed: int = SEED) -> list[dict]:
+    """生成查询(本地歌曲信息) {title, artist, duration(秒)}"""
+    rng = random.Random(seed)
+    return [{"title": rng.choice(TITLES) + rng.choice(TITLE_TAGS), "artist": _artist(rng), "duration": rng.randint(90, 420)}
+            for _ in range(count)]
+
+
+def make_candidates(query: dict, count: int, seed: int = SEED) -> list[dict]:
+    """生成与查询有不同程度相似的搜索结果(格式与backend.api的搜索结果相同, artist为列表, duration为秒)"""
+    rng = random.Random(f"{seed}-{query['title']}-{query['artist']}")
+    base_title = next((title for title in TITLES if query["title"].startswith(title)), query["title"])
+    candidates = []
+    for i in range(count):
+        match rng.randint(0, 3):
+            case 0:  # 同一首歌
+                title, artist, duration = _vary(rng, query["title"]), _vary(rng, query["artist"]), query["duration"] + rng.randint(-2, 2)
+            case 1:  # 同名的不同版本
+                title, artist, duration = base_title + rng.choice(TITLE_TAGS), query["artist"], query["duration"] + rng.randint(-40, 40)
+            case 2:  # 翻唱
+                title, artist, duration = _vary(rng, base_title), _artist(rng), query["duration"] + rng.randint(-30, 30)
+            case _:  # 无关的歌曲
+                title, artist, duration = rng.choice(TITLES) + rng.choice(TITLE_TAGS), _artist(rng), rng.randint(90, 420)
+        candidates.append({"id": i, "title": title, "artist": [s for s in artist.split("/") if s], "album": "",
+                           "duration": max(duration, 1), "source": rng.choice((Source.QM, Source.NE, Source.KG))})
+    return candidates
+
+
+def make_title_pairs(count: int, seed: int = SEED) -> list[tuple[str, str]]:
+    """生成标题对(查询标题, 搜索结果标题)"""
+    pairs = []
+    for query in make_queries(count // 20 + 1, seed):
+        pairs.extend((query["title"], candidate["title"]) for candidate in make_candidates(query, 20, seed))
+    return pairs[:count]
+
+
+def make_artist_pairs(count: int, seed: int = SEED) -> list[tuple[str, list[str]]]:
+    """生成歌手对(查询歌手字符串, 搜索结果歌手列表)"""
+    pairs = []
+    for query in make_queries(count // 20 + 1, seed):
+        pairs.extend((query["artist"], candidate["artist"]) for candidate in make_candidates(query, 20, seed))
+    return pairs[:count]
@@ -0,0 +1,56 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""规范化: 原unified_symbol(逐个str.replace + 正则) 与 转换表 + 缓存 对比
+
+以及每个查询与20个候选, 3个歌词源评分时的总耗时
+"""
+import re
+
+from backend import normalize
+from backend.calculate import calculate_artist_score, calculate_title_score
+
+from . import timeit
+from .matching import make_candidates, make_queries, make_title_pairs
+
+QUERY_COUNT = 50
+CANDIDATES_PER_SOURCE = 20
+SOURCES = 3
+
+
+def legacy_unified_symbol(text: str) -> str:
+    text = text.strip()
+    for k, v in normalize.symbol_map.items():
+        text = text.replace(k, v)
+    return re.sub(r"\s", " ", text)
+
+
+def main() -> None:
+    texts = [text for pair in make_title_pairs(2000) for text in pair]
+    if [legacy_unified_symbol(text) for text in texts] != [normalize.unified_symbol(text) for text in texts]:
+        msg = "unified_symbol结果不一致"
+        raise AssertionError(msg)
+
+    legacy_time = timeit(lambda: [legacy_unified_symbol(text) for text in texts]) * 1000
+    uncached_time = timeit(lambda: [normalize.unified_symbol.__wrapped__(text) for text in texts]) * 1000
+    cached_time = timeit(lambda: [normalize.unified_symbol(text) for text in texts]) * 1000
+    print(f"unified_symbol x{len(texts)}: legacy {legacy_time:.2f} ms, translate {uncached_time:.2f} ms, cached {cached_time:.2f} ms")
+
+    queries = make_queries(QUERY_COUNT)
+    jobs = [(query, make_candidates(query, CANDIDATES_PER_SOURCE * SOURCES)) for query in queries]
+
+    def score_all() -> None:
+        for query, candidates in jobs:
+            for candidate in candidates:
+                calculate_title_score(query["title"], candidate["title"])
+                calculate_artist_score(query["artist"], candidate["artist"])
+
+    for func in (normalize.unified_symbol, normalize.normalize_title, normalize.normalize_artist):
+        func.cache_clear()
+    score_time = timeit(score_all, repeat=1) * 1000
+    print(f"scoring {QUERY_COUNT} queries x {CANDIDATES_PER_SOURCE * SOURCES} candidates: {score_time:.1f} ms")
+    for name, info in normalize.cache_info().items():
+        print(f"  {name}: {info.hits} hits / {info.misses} misses ({info.hits / max(info.hits + info.misses, 1):.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""Lyrics.add_offset: 原实现(复制所有歌词行) 与 偏移视图对比"""
+from backend.fetcher.qm import qrc2list
+from backend.lyrics import ColumnarLyricsData, Lyrics, LyricsData, LyricsLine, LyricsWord, MultiLyricsData, OffsetLyricsData
+
+from . import timeit
+from .corpus import make_qrc
+
+LINE_COUNTS = (200, 1000, 5000)
+OFFSET = -1500
+PREVIEW_LINES = 20  # 预览时读取的行数
+
+
+def legacy_add_offset(lyrics: Lyrics, offset: int = 0) -> MultiLyricsData:
+    multi_lyrics_data = MultiLyricsData(lyrics)
+
+    if offset == 0:
+        return multi_lyrics_data
+
+    def _offset_time(time: int | None) -> int | None:
+        if isinstance(time, int):
+            return max(time + offset, 0)
+        return time
+
+    return MultiLyricsData({
+        lang: LyricsData([
+            LyricsLine((
+                _offset_time(lrc_line[0]),
+                _offset_time(lrc_line[1]),
+                [LyricsWord((_offset_time(word[0]), _offset_time(word[1]), word[2])) for word in lrc_line[2]],
+            ))
+            for lrc_line in lrc_list
+        ])
+        for lang, lrc_list in multi_lyrics_data.items()
+    })
+
+
+def main() -> None:
+    print(f"{'lines':>6} {'legacy ms':>10} {'preview ms':>11} {'stacked ms':>11} {'full ms':>8} {'columnar ms':>12}")
+    for line_count in LINE_COUNTS:
+        lyrics = Lyrics()
+        lyrics["orig"] = qrc2list(make_qrc(line_count))[1]
+        lyrics["roma"] = qrc2list(make_qrc(line_count, seed=1))[1]
+        if lyrics.add_offset(OFFSET).materialize() != legacy_add_offset(lyrics, OFFSET):
+            msg = "偏移结果不一致"
+            raise AssertionError(msg)
+        columnar = ColumnarLyricsData.from_lyrics_data(lyrics["orig"])
+
+        legacy_time = timeit(lambda lyrics=lyrics: legacy_add_offset(lyrics, OFFSET)) * 1000
+        preview_time = timeit(lambda lyrics=lyrics: [lyrics.add_offset(OFFSET)[lang][:PREVIEW_LINES] for lang in lyrics]) * 1000
+        stacked_time = timeit(lambda lyrics=lyrics: [lyrics.add_offset(OFFSET).add_offset(200).add_offset(-300)[lang][:PREVIEW_LINES]
+                                                     for lang in lyrics]) * 1000
+        full_time = timeit(lambda lyrics=lyrics: lyrics.add_offset(OFFSET).materialize()) * 1000
+        columnar_time = timeit(lambda columnar=columnar: OffsetLyricsData(columnar, OFFSET).to_columnar()) * 2 * 1000  # 两种语言
+        print(f"{line_count:>6} {legacy_time:>10.2f} {preview_time:>11.3f} {stacked_time:>11.3f} {full_time:>8.2f} {columnar_time:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
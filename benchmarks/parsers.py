@@ -0,0 +1,163 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""QRC/KRC/YRC解析: 原实现(每次调用编译表达式, 每行两次findall)与共享解析引擎对比"""
+import json
+import re
+from base64 import b64decode
+
+from backend.fetcher.kg import krc2dict
+from backend.fetcher.ne import yrc2list
+from backend.fetcher.qm import QRC_PATTERN, qrc2list
+from backend.lyrics import LyricsData, LyricsLine, LyricsWord, MultiLyricsData
+from utils.error import LyricsProcessingError
+
+from . import timeit
+from .corpus import make_krc, make_qrc, make_yrc
+
+
+def legacy_qrc2list(s_qrc: str) -> tuple[dict, LyricsData]:
+    """将qrc转换为列表[(行起始时间, 行结束时间, [(字起始时间, 字结束时间, 字内容)])]"""
+    m_qrc = QRC_PATTERN.search(s_qrc)
+    if not m_qrc or not m_qrc.group("content"):
+        msg = "不支持的歌词格式"
+        raise LyricsProcessingError(msg)
+    qrc: str = m_qrc.group("content")
+    qrc_lines = qrc.split('\n')
+    tags = {}
+    lrc_list = LyricsData([])
+    wrods_split_pattern = re.compile(r'(?:\[\d+,\d+\])?((?:(?!\(\d+,\d+\)).)+)\((\d+),(\d+)\)')  # 逐字匹配
+    line_split_pattern = re.compile(r'^\[(\d+),(\d+)\](.*)$')  # 逐行匹配
+    tag_split_pattern = re.compile(r"^\[(\w+):([^\]]*)\]$")
+
+    for i in qrc_lines:
+        line = i.strip()
+        line_split_content = re.findall(line_split_pattern, line)
+        if line_split_content:  # 判断是否为歌词行
+            line_start_time, line_duration, line_content = line_split_content[0]
+            lrc_list.append(LyricsLine((int(line_start_time), int(line_start_time) + int(line_duration), [])))
+            wrods_split_content = re.findall(wrods_split_pattern, line)
+            if wrods_split_content:  # 判断是否为逐字歌词
+                for text, starttime, duration in wrods_split_content:
+                    if text != "\r":
+                        lrc_list[-1][2].append(LyricsWord((int(starttime), int(starttime) + int(duration), text)))
+            else:  # 如果不是逐字歌词
+                lrc_list[-1][2].append(LyricsWord((int(line_start_time), int(line_start_time) + int(line_duration), line_content)))
+        else:
+            tag_split_content = re.findall(tag_split_pattern, line)
+            if tag_split_content:
+                tags.update({tag_split_content[0][0]: tag_split_content[0][1]})
+
+    return tags, lrc_list
+
+
+def legacy_krc2dict(krc: str) -> tuple[dict, dict]:
+    """将明文krc转换为字典{歌词类型: [(行起始时间, 行结束时间, [(字起始时间, 字结束时间, 字内容)])]}."""
+    lrc_dict = MultiLyricsData({})
+    tag_split_pattern = re.compile(r"^\[(\w+):([^\]]*)\]$")
+    tags: dict[str, str] = {}
+
+    line_split_pattern = re.compile(r'^\[(\d+),(\d+)\](.*)$')  # 逐行匹配
+    wrods_split_pattern = re.compile(r'(?:\[\d+,\d+\])?<(\d+),(\d+),\d+>((?:.(?!\d+,\d+,\d+>))*)')  # 逐字匹配
+    orig_list = LyricsData([])  # 原文歌词
+    roma_list = LyricsData([])
+    ts_list = LyricsData([])
+
+    for i in krc.splitlines():
+        line = i.strip()
+        if not line.startswith("["):
+            continue
+
+        tag_split_content = re.findall(tag_split_pattern, line)
+        if tag_split_content:  # 标签行
+            tags.update({tag_split_content[0][0]: tag_split_content[0][1]})
+            continue
+
+        line_split_content = re.findall(line_split_pattern, line)
+        if not line_split_content:
+            continue
+        line_start_time, line_duration, line_content = line_split_content[0]
+        orig_list.append(LyricsLine((int(line_start_time), int(line_start_time) + int(line_duration), [])))
+
+        wrods_split_content = re.findall(wrods_split_pattern, line_content)
+        if not wrods_split_content:
+            orig_list[-1][2].append(LyricsWord((int(line_start_time), int(line_start_time) + int(line_duration), line_content)))
+            continue
+
+        for word_start_time, word_duration, word_content in wrods_split_content:
+            orig_list[-1][2].append(LyricsWord((int(line_start_time) + int(word_start_time),
+                                    int(line_start_time) + int(word_start_time) + int(word_duration), word_content)))
+
+    if "language" in tags and tags["language"].strip() != "":
+        languages = json.loads(b64decode(tags["language"].strip()))
+        for language in languages["content"]:
+            if language["type"] == 0:  # 逐字(罗马音)
+                offset = 0  # 用于跳过一些没有内容的行,它们不会存在与罗马音的字典中
+                for i, line in enumerate(orig_list):
+                    if "".join([w[2] for w in line[2]]) == "":
+                        # 如果该行没有内容,则跳过
+                        offset += 1
+                        continue
+
+                    roma_line = (line[0], line[1], [])
+                    for j, word in enumerate(line[2]):
+                        roma_line[2].append((word[0], word[1], language["lyricContent"][i - offset][j]))
+                    roma_list.append(LyricsLine(roma_line))
+            elif language["type"] == 1:  # 逐行(翻译)
+                for i, line in enumerate(orig_list):
+                    ts_list.append(LyricsLine((line[0], line[1], [LyricsWord((line[0], line[1], language["lyricContent"][i][0]))])))
+
+    tags_str = ""
+    for key, value in tags.items():
+        if key in ["al", "ar", "au", "by", "offset", "ti"]:
+            tags_str += f"[{key}:{value}]\n"
+
+    for key, lrc_list in ({"orig": orig_list, "roma": roma_list, "ts": ts_list}).items():
+        if lrc_list:
+            lrc_dict[key] = lrc_list
+    return tags, lrc_dict
+
+
+def legacy_yrc2list(yrc: str) -> list:
+    """将yrc转换为列表[(行起始时间, 行结束时间, [(字起始时间, 字结束时间, 字内容)])]"""
+    lrc_list = LyricsData([])
+
+    line_split_pattern = re.compile(r'^\[(\d+),(\d+)\](.*)$')  # 逐行匹配
+    wrods_split_pattern = re.compile(r'(?:\[\d+,\d+\])?\((\d+),(\d+),\d+\)((?:.(?!\d+,\d+,\d+\)))*)')  # 逐字匹配
+    for i in yrc.splitlines():
+        line = i.strip()
+        if not line.startswith("["):
+            continue
+
+        line_split_content = re.findall(line_split_pattern, line)
+        if not line_split_content:
+            continue
+        line_start_time, line_duration, line_content = line_split_content[0]
+        lrc_list.append(LyricsLine((int(line_start_time), int(line_start_time) + int(line_duration), [])))
+
+        wrods_split_content = re.findall(wrods_split_pattern, line_content)
+        if not wrods_split_content:
+            lrc_list[-1][2].append(LyricsWord((int(line_start_time), int(line_start_time) + int(line_duration), line_content)))
+            continue
+
+        for word_start_time, word_duration, word_content in wrods_split_content:
+            lrc_list[-1][2].append(LyricsWord((int(word_start_time), int(word_start_time) + int(word_duration), word_content)))
+
+    return lrc_list
+
+
+def main() -> None:
+    print(f"{'format':>6} {'lines':>6} {'legacy ms':>10} {'engine ms':>10} {'speedup':>8}")
+    for lines in (200, 2000):
+        for name, legacy, engine, text in (("qrc", legacy_qrc2list, qrc2list, make_qrc(lines)),
+                                           ("krc", legacy_krc2dict, krc2dict, make_krc(lines)),
+                                           ("yrc", legacy_yrc2list, yrc2list, make_yrc(lines))):
+            if legacy(text) != engine(text):
+                msg = f"{name} 解析结果不一致"
+                raise AssertionError(msg)
+            legacy_time = timeit(lambda legacy=legacy, text=text: legacy(text)) * 1000
+            engine_time = timeit(lambda engine=engine, text=text: engine(text)) * 1000
+            print(f"{name:>6} {lines:>6} {legacy_time:>10.2f} {engine_time:>10.2f} {legacy_time / engine_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
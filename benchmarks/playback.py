@@ -0,0 +1,76 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""播放时查询当前歌词行与字: 逐行扫描 与 PlaybackIndex(二分查找) 对比
+
+模拟以60fps播放5分钟的歌曲, 生成的歌词按比例缩放到歌曲时长内(行数越多越密集)
+"""
+from backend.fetcher.qm import qrc2list
+from backend.lyrics import Lyrics, LyricsData, LyricsLine, LyricsWord
+from backend.playback import PlaybackIndex
+
+from . import timeit
+from .corpus import make_qrc
+
+SONG_DURATION = 5 * 60 * 1000
+FPS = 60
+LINE_COUNTS = (60, 200, 1000, 5000)
+
+
+def linear_lookup(lyrics_data: LyricsData, position: int) -> tuple[int, int | None] | None:
+    """逐行扫描所有行, 查找起始时间不晚于播放位置的最后一行与字(起始时间相同的行取第一行)"""
+    result = None
+    for i, line in enumerate(lyrics_data):
+        if line[0] <= position and (result is None or line[0] != lyrics_data[result][0]):
+            result = i
+    if result is None:
+        return None
+    word_index = None
+    for j, word in enumerate(lyrics_data[result][2]):
+        if word[0] <= position:
+            word_index = j
+    return result, word_index
+
+
+def fit_to_duration(lyrics_data: LyricsData, duration: int) -> LyricsData:
+    """将时间戳按比例缩放, 使最后一行在歌曲结束时结束"""
+    end = max(line[1] for line in lyrics_data)
+
+    def scale(time: int) -> int:
+        return time * duration // end
+
+    return LyricsData([LyricsLine((scale(line[0]), scale(line[1]), [LyricsWord((scale(word[0]), scale(word[1]), word[2])) for word in line[2]]))
+                       for line in lyrics_data])
+
+
+def uncached_copy(lyrics: Lyrics) -> Lyrics:
+    """复制歌词(不带推算完整时间戳的缓存)"""
+    copy = Lyrics({"duration": lyrics.duration})
+    copy.set_data(lyrics)
+    return copy
+
+
+def main() -> None:
+    positions = [frame * 1000 // FPS for frame in range(SONG_DURATION * FPS // 1000)]
+    print(f"{len(positions)} queries per language")
+    print(f"{'lines':>6} {'build ms':>9} {'linear ms':>10} {'index ms':>9} {'us/query':>9} {'speedup':>8}")
+    for line_count in LINE_COUNTS:
+        lyrics = Lyrics({"duration": SONG_DURATION // 1000})
+        lyrics["orig"] = fit_to_duration(qrc2list(make_qrc(line_count))[1], SONG_DURATION)
+
+        build_time = timeit(lambda lyrics=lyrics: PlaybackIndex(uncached_copy(lyrics), SONG_DURATION)) * 1000
+        index = PlaybackIndex(lyrics, SONG_DURATION)
+        lyrics_data = index.lyrics["orig"]
+        for position in positions:
+            found = index.lookup("orig", position)
+            if linear_lookup(lyrics_data, position) != (None if found is None else (found.line_index, found.word_index)):
+                msg = f"查询结果不一致: {position}"
+                raise AssertionError(msg)
+
+        linear_time = timeit(lambda lyrics_data=lyrics_data: [linear_lookup(lyrics_data, position) for position in positions], repeat=1) * 1000
+        index_time = timeit(lambda index=index: [index.lookup("orig", position) for position in positions]) * 1000
+        print(f"{line_count:>6} {build_time:>9.2f} {linear_time:>10.1f} {index_time:>9.2f} {index_time * 1000 / len(positions):>9.2f} "
+              f"{linear_time / index_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""qrc_decrypt: 1KB-1MB 合成数据, 每KB耗时应保持稳定(线性)"""
+import os
+
+from backend.decryptor import qrc_decrypt, qrc_encrypt
+
+from . import timeit
+from .tripledes import key_setup_times
+
+
+def make_payload(size: int) -> tuple[bytes, str]:
+    """生成约size字节的密文与对应明文"""
+    text = os.urandom(size // 2).hex()  # 几乎不可压缩
+    return qrc_encrypt(text), text
+
+
+def main() -> None:
+    cold, cached, _snapshot = key_setup_times()
+    print(f"key setup: cold {cold * 1000:.3f}ms, cached {cached * 1e6:.2f}us")
+    print(f"{'size':>8} {'total ms':>10} {'ms/KB':>8}")
+    for kb in (1, 4, 16, 64, 256, 1024):
+        encrypted, text = make_payload(kb * 1024)
+        if qrc_decrypt(encrypted) != text:
+            msg = "解密结果不正确"
+            raise AssertionError(msg)
+        elapsed = timeit(lambda encrypted=encrypted: qrc_decrypt(encrypted), repeat=1 if kb >= 256 else 3) * 1000
+        print(f"{kb:>6}KB {elapsed:>10.1f} {elapsed / (len(encrypted) / 1024):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""候选排序: 对所有候选计算分数后排序 与 rank_candidates(上界剪枝 + 提前结束) 对比
+
+以及按时长预筛选(DurationWindow)时每个查询跳过的搜索结果数
+"""
+from backend.calculate import DurationWindow, calculate_candidate_score, rank_candidates
+
+from . import timeit
+from .matching import make_candidates, make_queries
+
+QUERY_COUNT = 50
+CANDIDATE_COUNTS = (20, 60, 200)
+TOP_KS = (1, 5)
+WINDOW_CANDIDATE_COUNT = 60
+
+
+def brute_force_rank(query: dict, candidates: list[dict], top_k: int, window: DurationWindow | None = None) -> list[tuple[float, dict]]:
+    scored = []
+    for candidate in candidates:
+        penalty = window.get_penalty(abs(candidate["duration"] - query["duration"])) if window is not None else 0.0
+        if penalty is not None:
+            scored.append((calculate_candidate_score(query, candidate) - penalty, candidate))
+    return sorted(scored, key=lambda item: item[0], reverse=True)[:top_k]
+
+
+def main() -> None:
+    queries = make_queries(QUERY_COUNT)
+    print(f"{'candidates':>10} {'top_k':>6} {'brute ms':>9} {'ranked ms':>10} {'scored':>8}")
+    for candidate_count in CANDIDATE_COUNTS:
+        jobs = [(query, make_candidates(query, candidate_count)) for query in queries]
+        for top_k in TOP_KS:
+            scored = 0
+            for query, candidates in jobs:
+                stats = {}
+                if rank_candidates(query, candidates, top_k, stats=stats) != brute_force_rank(query, candidates, top_k):
+                    msg = f"{query['title']} 结果不一致"
+                    raise AssertionError(msg)
+                scored += stats["scored"]
+
+            brute_time = timeit(lambda jobs=jobs, top_k=top_k: [brute_force_rank(q, c, top_k) for q, c in jobs]) * 1000
+            ranked_time = timeit(lambda jobs=jobs, top_k=top_k: [rank_candidates(q, c, top_k) for q, c in jobs]) * 1000
+            print(f"{candidate_count:>10} {top_k:>6} {brute_time:>9.1f} {ranked_time:>10.1f} "
+                  f"{scored / (candidate_count * QUERY_COUNT):>8.0%}")
+
+    jobs = [(query, make_candidates(query, WINDOW_CANDIDATE_COUNT)) for query in queries]
+    window = DurationWindow()
+    skipped = []
+    for query, candidates in jobs:
+        stats = {}
+        if rank_candidates(query, candidates, 5, window, stats) != brute_force_rank(query, candidates, 5, window):
+            msg = f"{query['title']} 按时长筛选的结果不一致"
+            raise AssertionError(msg)
+        skipped.append(stats["skipped"])
+    plain_time = timeit(lambda: [rank_candidates(q, c, 5) for q, c in jobs]) * 1000
+    window_time = timeit(lambda: [rank_candidates(q, c, 5, window) for q, c in jobs]) * 1000
+    print(f"{window}: {plain_time:.1f} ms -> {window_time:.1f} ms, skipped per query "
+          f"min {min(skipped)} / mean {sum(skipped) / len(skipped):.1f} / max {max(skipped)} of {WINDOW_CANDIDATE_COUNT}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""文本相似度: SequenceMatcher.ratio 与 位并行编辑距离(USE_LEVENSHTEIN) 的速度与评分差异"""
+import random
+from difflib import SequenceMatcher
+
+from backend import calculate
+from backend.calculate import calculate_title_score, rank_candidates
+from backend.levenshtein import levenshtein_distance, levenshtein_ratio
+from backend.normalize import normalize_title
+
+from . import timeit
+from .matching import make_candidates, make_queries, make_title_pairs
+
+PAIR_COUNT = 2000
+QUERY_COUNT = 100
+CANDIDATE_COUNT = 60
+
+
+def reference_distance(text1: str, text2: str) -> int:
+    previous = list(range(len(text2) + 1))
+    for i, char1 in enumerate(text1, 1):
+        current = [i]
+        for j, char2 in enumerate(text2, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char1 != char2)))
+        previous = current
+    return previous[-1]
+
+
+def title_scores(pairs: list[tuple[str, str]], use_levenshtein: bool) -> list[float]:
+    calculate.USE_LEVENSHTEIN = use_levenshtein
+    try:
+        return [calculate_title_score(title1, title2) for title1, title2 in pairs]
+    finally:
+        calculate.USE_LEVENSHTEIN = False
+
+
+def top1(jobs: list[tuple[dict, list[dict]]], use_levenshtein: bool) -> list[int]:
+    calculate.USE_LEVENSHTEIN = use_levenshtein
+    try:
+        return [rank_candidates(query, candidates)[0][1]["id"] for query, candidates in jobs]
+    finally:
+        calculate.USE_LEVENSHTEIN = False
+
+
+def main() -> None:
+    rng = random.Random(0)
+    for _ in range(2000):
+        text1 = "".join(rng.choice("ab あい") for _ in range(rng.randint(0, 80)))
+        text2 = "".join(rng.choice("ab あい") for _ in range(rng.randint(0, 80)))
+        if levenshtein_distance(text1, text2) != reference_distance(text1, text2):
+            msg = f"编辑距离不一致: {text1!r} {text2!r}"
+            raise AssertionError(msg)
+
+    pairs = make_title_pairs(PAIR_COUNT)
+    normalized = [(normalize_title(title1), normalize_title(title2)) for title1, title2 in pairs]
+    difflib_time = timeit(lambda: [SequenceMatcher(lambda x: x == " ", a, b).ratio() for a, b in normalized]) * 1000
+    levenshtein_time = timeit(lambda: [levenshtein_ratio(a, b) for a, b in normalized]) * 1000
+    print(f"ratio x{len(normalized)}: SequenceMatcher {difflib_time:.2f} ms, levenshtein {levenshtein_time:.2f} ms "
+          f"({difflib_time / levenshtein_time:.1f}x)")
+
+    title_scores(pairs, False)  # 预热规范化缓存
+    difflib_time = timeit(lambda: title_scores(pairs, False)) * 1000
+    levenshtein_time = timeit(lambda: title_scores(pairs, True)) * 1000
+    print(f"calculate_title_score x{len(pairs)}: SequenceMatcher {difflib_time:.2f} ms, levenshtein {levenshtein_time:.2f} ms")
+
+    # 与当前评分的差异
+    expected, actual = title_scores(pairs, False), title_scores(pairs, True)
+    differences = [abs(a - b) for a, b in zip(expected, actual, strict=True)]
+    print(f"title score difference: mean {sum(differences) / len(differences):.2f}, max {max(differences):.2f}, "
+          f"<=5: {sum(d <= 5 for d in differences) / len(differences):.1%}, "
+          f"same: {sum(d == 0 for d in differences) / len(differences):.1%}")
+
+    jobs = [(query, make_candidates(query, CANDIDATE_COUNT)) for query in make_queries(QUERY_COUNT)]
+    agreement = sum(a == b for a, b in zip(top1(jobs, False), top1(jobs, True), strict=True))
+    print(f"rank_candidates top-1 agreement: {agreement}/{len(jobs)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""标题评分: 原实现(每次比较动态生成正则并逐个统一tags) 与 title_tags(按原文去除tags + 缓存) 对比"""
+import re
+
+from backend import calculate
+from backend.calculate import TITLE_TAG_PATTERN, calculate_title_score, text_difference
+from backend.normalize import normalize_title
+
+from . import timeit
+from .matching import make_title_pairs
+
+PAIR_COUNT = 4000
+
+# 手工挑选的标题对(各类tags, 全角符号, 相同开头)
+GOLDEN_PAIRS = [
+    ("unravel", "unravel (TV size ver.)"),
+    ("unravel (TV size)", "unravel (anime edit)"),
+    ("紅蓮華 (Instrumental)", "紅蓮華（伴奏）"),
+    ("紅蓮華 (off vocal ver.)", "紅蓮華 -Instrumental-"),
+    ("夜に駆ける (Acoustic Version)", "夜に駆ける [Remix]"),
+    ("Lemon (Live)", "Lemon - Live Version"),
+    ("only my railgun (TV size)", "only my railgun ～TV size～"),
+    ("God knows... (Short Ver.)", "God knows..."),
+    ("晴天 (纯音乐)", "晴天(Piano ver.)"),
+    ("Butter-Fly (2019 Remastered)", "Butter-Fly -Re:Start-"),
+    ("群青 (English ver.)", "群青 (Japanese ver.)"),
+    ("残響散歌 (anime size edit)", "残響散歌 (TVサイズ)"),
+    ("secret base ～君がくれたもの～", "secret base ～君がくれたもの～ (10 years after Ver.)"),
+    ("アイドル (solo ver.)", "アイドル (mixed)"),
+    ("Hello (edited)", "Hello (Radio Edit)"),
+    ("STAY ALIVE", "STAY ALIVE (feat. Ado)"),
+]
+
+
+def legacy_calculate_title_score(title1: str, title2: str) -> float:
+    def get_tags(not_same: str) -> tuple[list, str]:
+        not_same_tags = TITLE_TAG_PATTERN.findall(not_same)
+        not_same_tags: list[str] = [item.strip() for tup in not_same_tags for item in tup if item]
+        not_same_other = re.sub(r"|".join(not_same_tags) + r"|[-><)(\]\[～]", "", not_same)
+
+        for i, tag in enumerate(not_same_tags):
+            tag_ = re.sub(r"ver(?:sion)?\.?", "ver", tag)
+            tag_ = re.sub(r"伴奏|纯音乐|inst\.?(?:rumental)|off ?vocal(?: ?[Vv]er.)?", "inst", tag_)
+            tag_ = tag_.replace("mixed", "mix").replace("edited", "edit")
+            tag_ = re.sub(r"(solo|mix|edit|style|size) ver", r"\1", tag_)
+            tag_ = re.sub("(?:tv|anime) ?(?:サイズ|size)?(?: ?edit)?(?: ?ver)?", "tv size", tag_)
+            not_same_tags[i] = tag_
+
+        return not_same_tags, not_same_other
+
+    title1, title2 = normalize_title(title1), normalize_title(title2)
+    if title1 == title2:
+        return 100
+
+    score0 = max(text_difference(title1, title2), 0) * 100
+    same_begin = ""
+
+    for i, text1 in enumerate(title1):
+        if len(title2) > i and text1 == title2[i]:
+            same_begin += text1
+        else:
+            break
+
+    if same_begin in (title1, title2) or not same_begin:
+        return score0
+
+    not_same1_tags, not_same1_other = get_tags(title1[len(same_begin):])
+    not_same2_tags, not_same2_other = get_tags(title2[len(same_begin):])
+
+    tag1_no_match = []
+    tag2_no_match = not_same2_tags
+    for tag1 in not_same1_tags:
+        if tag1 in not_same2_tags:
+            tag2_no_match.remove(tag1)
+        elif re.search(r"(?:solo|mix|edit|style|size|edit|inst)$", tag1):
+            tag1_no_match.append(tag1)
+        elif tag1 in not_same2_other:
+            not_same1_other += tag1
+
+    for tag2 in tag2_no_match:
+        if not re.search(r"(?:solo|mix|edit|style|size|edit|inst)$", tag2) and tag2 in not_same1_other:
+            not_same2_other += tag2
+            tag2_no_match.remove(tag2)
+
+    kp = len(same_begin) / ((len(not_same1_other) + len(not_same2_other)) / 2 + len(same_begin))
+    score1 = 100 * kp + max(text_difference(not_same1_other, not_same2_other), 0) * (1 - kp)
+
+    if not tag1_no_match and not tag2_no_match:
+        return max(score1 * 0.7 + 30, score0)
+
+    score2, score3 = 0, 0
+    if tag1_no_match and tag2_no_match:
+        for tag1 in tag1_no_match:
+            score2 += max(text_difference(tag1, tag2) for tag2 in tag2_no_match) * (30 / len(tag1_no_match))
+
+        for tag2 in tag2_no_match:
+            score3 += max(text_difference(tag1, tag2) for tag1 in tag1_no_match) * (30 / len(tag2_no_match))
+
+    return max(score1 * 0.7 + max(score2, score3), score0)
+
+
+def main() -> None:
+    pairs = GOLDEN_PAIRS + make_title_pairs(PAIR_COUNT)
+    pairs += [(title2, title1) for title1, title2 in pairs]
+    for title1, title2 in pairs:
+        if calculate_title_score(title1, title2) != legacy_calculate_title_score(title1, title2):
+            msg = f"结果不一致: {title1!r} {title2!r}"
+            raise AssertionError(msg)
+
+    legacy_time = timeit(lambda: [legacy_calculate_title_score(title1, title2) for title1, title2 in pairs]) * 1000
+
+    def uncached() -> None:
+        calculate.title_tags.cache_clear()
+        calculate._canonical_title_tag.cache_clear()  # noqa: SLF001
+        for title1, title2 in pairs:
+            calculate_title_score(title1, title2)
+
+    uncached_time = timeit(uncached) * 1000
+    cached_time = timeit(lambda: [calculate_title_score(title1, title2) for title1, title2 in pairs]) * 1000
+    info = calculate.title_tags.cache_info()
+    print(f"calculate_title_score x{len(pairs)}: legacy {legacy_time:.1f} ms, cold cache {uncached_time:.1f} ms, "
+          f"warm cache {cached_time:.1f} ms (title_tags {info.hits} hits / {info.misses} misses)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""qmc1/krc 异或: 逐字节循环与整体异或对比"""
+import os
+
+from backend.decryptor import KRC_KEY, krc_decrypt, krc_encrypt
+from backend.decryptor.qmc1 import PRIVKEY, qmc1_decrypt
+from backend.decryptor.xor import np, repeat_key, xor_bytes
+
+from . import timeit
+
+
+def loop_qmc1_decrypt(data: bytearray) -> None:
+    for i, _value in enumerate(data):
+        data[i] ^= PRIVKEY[(i % 0x7FFF) & 0x7F] if i > 0x7FFF else PRIVKEY[i & 0x7F]
+
+
+def loop_krc_xor(data: bytes) -> bytearray:
+    decrypted_data = bytearray()
+    for i, item in enumerate(data):
+        decrypted_data.append(item ^ KRC_KEY[i % len(KRC_KEY)])
+    return decrypted_data
+
+
+def main() -> None:
+    print(f"backend: {'numpy' if np is not None else 'int'}")
+    print(f"{'size':>8} {'qmc1 loop ms':>13} {'qmc1 ms':>8} {'krc xor loop ms':>16} {'krc decrypt ms':>15}")
+    for kb in (4, 64, 1024):
+        data = os.urandom(kb * 1024)
+        expected = bytearray(data)
+        loop_qmc1_decrypt(expected)
+        actual = bytearray(data)
+        qmc1_decrypt(actual)
+        if actual != expected or loop_krc_xor(data) != xor_bytes(data, repeat_key(KRC_KEY, len(data))):
+            msg = "异或结果不一致"
+            raise AssertionError(msg)
+
+        krc = krc_encrypt(data.hex())
+        qmc1_loop = timeit(lambda data=data: loop_qmc1_decrypt(bytearray(data)), repeat=1) * 1000
+        qmc1 = timeit(lambda data=data: qmc1_decrypt(bytearray(data))) * 1000
+        krc_loop = timeit(lambda krc=krc: loop_krc_xor(krc[4:]), repeat=1) * 1000
+        krc_time = timeit(lambda krc=krc: krc_decrypt(krc)) * 1000
+        print(f"{kb:>6}KB {qmc1_loop:>13.2f} {qmc1:>8.2f} {krc_loop:>16.2f} {krc_time:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
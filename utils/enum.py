@@ -33,6 +33,13 @@ class LyricsFormat(Enum):
     JSON = 8
 
 
+class WordTimestampType(Enum):
+    # 逐字歌词中字时间戳的编码方式
+    SUFFIX = 0  # 字(起始时间,时长) QRC
+    OFFSET_PREFIX = 1  # <相对行起始时间的偏移,时长,0>字 KRC
+    PREFIX = 2  # (起始时间,时长,0)字 YRC
+
+
 class SearchType(Enum):
     SONG = 0
     ALBUM = 1
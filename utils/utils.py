@@ -5,7 +5,7 @@ import locale
 import re
 import sys
 from collections import OrderedDict
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator
 from typing import Any
 
 from charset_normalizer import from_bytes, from_path
@@ -35,6 +35,22 @@ def time2ms(m: int | str, s: int | str, ms: int | str) -> int:
     return (int(m) * 60 + int(s)) * 1000 + int(ms)
 
 
+LINE_BOUNDARIES = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """将文本块流按行切分(结果与将文本块拼接后调用str.splitlines相同)"""
+    pending = ""
+    for chunk in chunks:
+        lines = (pending + chunk).splitlines(keepends=True)
+        # 最后一行可能不完整(或以"\r"结尾而下一块以"\n"开头), 留到下一块处理
+        pending = lines.pop() if lines else ""
+        for line in lines:
+            yield line.rstrip(LINE_BOUNDARIES)
+    if pending:
+        yield from pending.splitlines()
+
+
 def read_unknown_encoding_file(file_path: str | None = None, file_data: bytes | None = None, sign_word: Iterable[str] | None = None) -> str:
     """读取未知编码的文件"""
     if file_data is not None: